@@ -1,49 +1,72 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 import os
-from dotenv import load_dotenv
+from config import load_config
 from database import db
+import db_config
+from serialization import FastJSONProvider
 
-load_dotenv()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+def create_app(overrides=None):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config.update(load_config())
+    if overrides:
+        app.config.update(overrides)
 
-database_url = os.environ.get('DATABASE_URL', 'sqlite:///flowfocus.db')
-if database_url.startswith('postgres://'):
-    database_url = database_url.replace('postgres://', 'postgresql://', 1)
-app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if os.environ.get('FLASK_ENV') != 'production':
+        os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
-app.config['SESSION_COOKIE_SAMESITE'] = 'None'
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SECURE'] = os.environ.get('FLASK_ENV') == 'production'
+    db.init_app(app)
+    db_config.init_app(app, db)
 
-db.init_app(app)
+    import instrumentation
+    instrumentation.init_app(app)
+    import pubsub
+    pubsub.init_app(app)
+    import sync_guard
+    sync_guard.init_app(app)
 
-allowed_origins = [
-    'http://localhost:3000',
-    os.environ.get('FRONTEND_URL', 'http://localhost:3000')
-]
-CORS(app, supports_credentials=True, origins=allowed_origins, allow_headers=['Content-Type'])
+    allowed_origins = [
+        'http://localhost:3000',
+        app.config['FRONTEND_URL']
+    ]
+    CORS(app, supports_credentials=True, origins=allowed_origins, allow_headers=['Content-Type'])
 
-from models import User, Task, CalendarSync
-from routes import auth, tasks, calendar_sync, settings
+    from routes import auth, tasks, calendar_sync, settings, plan, stream, analytics
 
-app.register_blueprint(auth.bp)
-app.register_blueprint(tasks.bp)
-app.register_blueprint(calendar_sync.bp)
-app.register_blueprint(settings.bp)
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(tasks.bp)
+    app.register_blueprint(calendar_sync.bp)
+    app.register_blueprint(settings.bp)
+    app.register_blueprint(plan.bp)
+    app.register_blueprint(stream.bp)
+    app.register_blueprint(analytics.bp)
+
+    @app.route('/')
+    def index():
+        return jsonify({"message": "FlowFocus API", "status": "running"})
+
+    if app.config['AUTO_MIGRATE']:
+        # Opt-in for single-worker deploys; otherwise run `python migrate.py` once per release
+        from migrate import migrate
+        migrate(app)
+
+    return app
+
+
+def __getattr__(name):
+    # `gunicorn app:app`, the start command before wsgi.py, keeps working;
+    # the app is only built when something asks for it
+    if name == 'app':
+        from wsgi import app
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-@app.route('/')
-def index():
-    return jsonify({"message": "FlowFocus API", "status": "running"})
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
+    from migrate import migrate
+    # The threaded dev server can hold a few streams itself
+    app = create_app({'SERVE_STREAM': True})
+    migrate(app)
     app.run(debug=True, port=5000)
-else:
-    # When running with gunicorn, create tables on import
-    with app.app_context():
-        db.create_all()
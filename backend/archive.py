@@ -0,0 +1,136 @@
+"""Move cold rows out of the hot tasks and calendar_syncs tables.
+
+Completed tasks older than ARCHIVE_TASKS_AFTER_DAYS move to archived_tasks,
+and day syncs older than ARCHIVE_SYNCS_AFTER_DAYS move to
+archived_calendar_syncs with their events and intervals zlib-compressed.
+Each batch of at most ARCHIVE_BATCH_SIZE rows is copied and deleted in its
+own short transaction, so the job never holds long locks. Run it from cron:
+
+    python archive.py [--task-age-days 90] [--sync-age-days 30] [--batch-size 500] [--pause 0.1]
+
+Archived rows are read back only when a request passes include_archived=true.
+"""
+from datetime import date, datetime, timedelta
+from database import db, on_conflict_insert
+from etags import bump_data_versions
+from models import ArchivedCalendarSync, ArchivedTask, CalendarSync, Task
+import search
+import time
+
+ARCHIVED_TASK_COLUMNS = (
+    ArchivedTask.task_id.label('id'),
+    ArchivedTask.user_id,
+    ArchivedTask.title,
+    ArchivedTask.description,
+    ArchivedTask.duration_minutes,
+    ArchivedTask.priority,
+    ArchivedTask.completed,
+    ArchivedTask.completed_at,
+    ArchivedTask.created_at,
+)
+
+
+def include_archived(args):
+    return args.get('include_archived', 'false').lower() == 'true'
+
+
+def archive_tasks(older_than_days, batch_size=500, pause=0, now=None):
+    """Archive completed tasks finished more than `older_than_days` ago; returns the count moved"""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    moved = 0
+    while True:
+        tasks = Task.query.filter(
+            Task.completed == True, Task.completed_at < cutoff  # noqa: E712
+        ).order_by(Task.completed_at).limit(batch_size).all()
+        if not tasks:
+            return moved
+
+        db.session.execute(ArchivedTask.__table__.insert(), [
+            {
+                'task_id': task.id,
+                'user_id': task.user_id,
+                'title': task.title,
+                'description': task.description,
+                'duration_minutes': task.duration_minutes,
+                'priority': task.priority,
+                'completed': True,
+                'completed_at': task.completed_at,
+                'created_at': task.created_at,
+                'archived_at': datetime.utcnow(),
+            }
+            for task in tasks
+        ])
+        task_ids = [task.id for task in tasks]
+        Task.query.filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
+        # Query.delete bypasses the search hooks
+        search.remove_tasks(db.session.connection(), task_ids)
+        bump_data_versions({task.user_id for task in tasks})
+        db.session.commit()
+
+        moved += len(task_ids)
+        if pause:
+            time.sleep(pause)
+
+
+def archive_syncs(older_than_days, batch_size=500, pause=0, today=None):
+    """Archive CalendarSync rows for days more than `older_than_days` ago; returns the count moved"""
+    cutoff = (today or date.today()) - timedelta(days=older_than_days)
+    moved = 0
+    while True:
+        syncs = CalendarSync.query.filter(
+            CalendarSync.sync_date < cutoff
+        ).order_by(CalendarSync.sync_date).limit(batch_size).all()
+        if not syncs:
+            return moved
+
+        rows = [
+            {
+                'user_id': sync.user_id,
+                'sync_date': sync.sync_date,
+                'total_minutes': sync.total_minutes,
+                'available_minutes': sync.available_minutes,
+                'payload': ArchivedCalendarSync.pack(sync.events_json, sync.busy_json, sync.free_json),
+                'created_at': sync.created_at,
+                'archived_at': datetime.utcnow(),
+            }
+            for sync in syncs
+        ]
+        insert = on_conflict_insert()
+        if insert is None:
+            for row in rows:
+                ArchivedCalendarSync.query.filter_by(user_id=row['user_id'], sync_date=row['sync_date']).delete()
+            db.session.execute(ArchivedCalendarSync.__table__.insert(), rows)
+        else:
+            # A day resynced after it was archived replaces the older copy
+            statement = insert(ArchivedCalendarSync).values(rows)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['user_id', 'sync_date'],
+                set_={column: statement.excluded[column] for column in
+                      ('total_minutes', 'available_minutes', 'payload', 'created_at', 'archived_at')}
+            ))
+        CalendarSync.query.filter(CalendarSync.id.in_([sync.id for sync in syncs])).delete(synchronize_session=False)
+        bump_data_versions({sync.user_id for sync in syncs})
+        db.session.commit()
+
+        moved += len(syncs)
+        if pause:
+            time.sleep(pause)
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    app = create_app()
+
+    parser = argparse.ArgumentParser(description='Archive old completed tasks and calendar syncs')
+    parser.add_argument('--task-age-days', type=int, default=app.config['ARCHIVE_TASKS_AFTER_DAYS'])
+    parser.add_argument('--sync-age-days', type=int, default=app.config['ARCHIVE_SYNCS_AFTER_DAYS'])
+    parser.add_argument('--batch-size', type=int, default=app.config['ARCHIVE_BATCH_SIZE'])
+    parser.add_argument('--pause', type=float, default=0, help='seconds to sleep between batches')
+    args = parser.parse_args()
+
+    with app.app_context():
+        tasks = archive_tasks(args.task_age_days, args.batch_size, args.pause)
+        syncs = archive_syncs(args.sync_age_days, args.batch_size, args.pause)
+    print(f'archived {tasks} tasks and {syncs} calendar syncs')
@@ -0,0 +1,60 @@
+"""Daily analytics from the daily_stats rollup vs an ad-hoc scan over tasks."""
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import Timer, app, create_user, logged_in_client, report, reset_db
+from database import db
+from models import Task
+from rollups import backfill
+
+
+def scan(user_id, start, days):
+    """What the endpoint would cost without the rollup"""
+    since = datetime.combine(start, datetime.min.time())
+    rows = db.session.query(Task.completed_at, Task.duration_minutes).filter(
+        Task.user_id == user_id, Task.completed == True, Task.completed_at >= since,  # noqa: E712
+        Task.completed_at < since + timedelta(days=days)
+    ).all()
+    totals = {}
+    for completed_at, minutes in rows:
+        totals[completed_at.date()] = totals.get(completed_at.date(), 0) + minutes
+    return totals
+
+
+def main(sizes, days=30, repeat=50):
+    rng = random.Random(0)
+    for n in sizes:
+        print(f'--- {n} tasks over a year, {days}-day window ---')
+        reset_db()
+        user_id = create_user()
+        first_day = date.today() - timedelta(days=364)
+        with app.app_context():
+            db.session.bulk_insert_mappings(Task, [
+                {'user_id': user_id, 'title': f'task {i}', 'duration_minutes': rng.choice((15, 30, 60)),
+                 'completed': True,
+                 'completed_at': datetime.combine(first_day + timedelta(days=rng.randrange(365)),
+                                                  datetime.min.time()) + timedelta(hours=rng.randrange(8, 20))}
+                for i in range(n)
+            ])
+            db.session.commit()
+
+            with Timer() as t:
+                backfill()
+            report('backfill', n, t.elapsed)
+
+            start = date.today() - timedelta(days=days - 1)
+            with Timer() as t:
+                for _ in range(repeat):
+                    scan(user_id, start, days)
+            report('ad-hoc scan over tasks', repeat, t.elapsed)
+
+        client = logged_in_client(user_id)
+        with Timer() as t:
+            for _ in range(repeat):
+                client.get('/api/analytics/daily', query_string={'days': days})
+        report('GET /api/analytics/daily (rollup)', repeat, t.elapsed)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,255 @@
+"""Latency and throughput for every API endpoint under concurrent load.
+
+    python -m benchmarks.api_load --users 50 --tasks 200 --events 6 \
+        --requests 500 --concurrency 8 --output results.json
+    python -m benchmarks.api_load --compare results.json --fail-on-regression 20
+
+Seeds a throwaway database with users, tasks and calendar events (synced
+through the in-process fake Google Calendar), then drives the auth, tasks,
+calendar, settings and plan blueprints through the Flask test client from
+`--concurrency` threads, one endpoint at a time. Reports p50/p95/p99
+latency and throughput per endpoint and writes them as JSON so runs can be
+compared across commits.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.common import app, create_user, logged_in_client, percentile, reset_db
+from benchmarks.fake_google import FakeCalendarService, fake_client_factory
+from database import db
+from models import Task, User
+import routes.calendar_sync
+from routes.calendar_sync import sync_range
+import sync_guard
+
+PRIORITIES = ('High', 'Medium', 'Low')
+SYNC_DAYS = 7
+
+
+def seed(users, tasks, events, service):
+    rng = random.Random(0)
+    reset_db()
+    service.seed_days(date.today(), SYNC_DAYS, per_day=events, tz=timezone(timedelta(hours=-5)))
+    client_for = fake_client_factory(service)
+    for user_id in range(1, users + 1):
+        create_user(user_id)
+    with app.app_context():
+        db.session.bulk_insert_mappings(Task, [
+            {'user_id': user_id, 'title': f'task {user_id}-{i}',
+             'duration_minutes': rng.choice((15, 30, 45, 60, 90)),
+             'priority': rng.choice(PRIORITIES),
+             'completed': rng.random() < 0.3}
+            for user_id in range(1, users + 1) for i in range(tasks)
+        ])
+        db.session.commit()
+        for user in User.query.all():
+            sync_range(user, date.today(), SYNC_DAYS, client_for(user))
+        task_ids = {}
+        for task_id, user_id in db.session.query(Task.id, Task.user_id):
+            task_ids.setdefault(user_id, []).append(task_id)
+    return task_ids
+
+
+class Context:
+    """Shared state the endpoint request builders draw from"""
+
+    def __init__(self, users, task_ids, seed=0):
+        self.users = users
+        self.task_ids = task_ids
+        self.created = deque()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def client(self):
+        # One test client and user per thread, like one browser tab each
+        if not hasattr(self.local, 'client'):
+            with self.lock:
+                user_id = self.rng.randint(1, self.users)
+            self.local.user_id = user_id
+            self.local.client = logged_in_client(user_id)
+        return self.local.client, self.local.user_id
+
+    def task_id(self, user_id):
+        with self.lock:
+            return self.rng.choice(self.task_ids[user_id])
+
+
+def created_task_id(ctx, client, user_id):
+    try:
+        return ctx.created.popleft()
+    except IndexError:
+        return client.post('/api/tasks', json={'title': 'to delete'}).json['id']
+
+
+def record_created(ctx, response):
+    if response.status_code == 201:
+        ctx.created.append(response.json['id'])
+    return response
+
+
+def events_window():
+    start = datetime.combine(date.today(), datetime.min.time())
+    return {'start': start.isoformat(), 'end': (start + timedelta(days=1)).isoformat()}
+
+
+# name -> function(ctx, client, user_id) returning a response
+ENDPOINTS = {
+    'auth.me': lambda ctx, c, u: c.get('/auth/me'),
+    'auth.google': lambda ctx, c, u: c.post('/auth/google'),
+    'tasks.list': lambda ctx, c, u: c.get('/api/tasks', query_string={'limit': 100}),
+    'tasks.list_incomplete': lambda ctx, c, u: c.get('/api/tasks', query_string={'completed': 'false', 'limit': 100}),
+    'tasks.get': lambda ctx, c, u: c.get(f'/api/tasks/{ctx.task_id(u)}'),
+    'tasks.next': lambda ctx, c, u: c.get('/api/tasks/next'),
+    'tasks.next_k': lambda ctx, c, u: c.get('/api/tasks/next', query_string={'k': 5}),
+    'tasks.export': lambda ctx, c, u: c.get('/api/tasks/export'),
+    'tasks.create': lambda ctx, c, u: record_created(ctx, c.post('/api/tasks', json={
+        'title': 'load test', 'duration_minutes': 30, 'priority': 'Medium'})),
+    'tasks.update': lambda ctx, c, u: c.put(f'/api/tasks/{ctx.task_id(u)}', json={
+        'priority': ctx.rng.choice(PRIORITIES)}),
+    'tasks.batch': lambda ctx, c, u: c.post('/api/tasks/batch', json={'operations': [
+        {'op': 'update', 'id': ctx.task_id(u), 'data': {'duration_minutes': 30}} for _ in range(20)]}),
+    'tasks.delete': lambda ctx, c, u: c.delete(f'/api/tasks/{created_task_id(ctx, c, u)}'),
+    # Seeding leaves every row fresh, so these answer from stored rows
+    'calendar.sync': lambda ctx, c, u: c.post('/api/calendar/sync'),
+    'calendar.sync_week': lambda ctx, c, u: c.post('/api/calendar/sync', query_string={'days': SYNC_DAYS}),
+    # The full sync path: pull from the fake Calendar API and rebuild the rows
+    'calendar.sync_forced': lambda ctx, c, u: c.post('/api/calendar/sync', query_string={'force': 'true'}),
+    'calendar.sync_week_forced': lambda ctx, c, u: c.post('/api/calendar/sync', query_string={
+        'days': SYNC_DAYS, 'force': 'true'}),
+    'calendar.today': lambda ctx, c, u: c.get('/api/calendar/today'),
+    'calendar.range': lambda ctx, c, u: c.get('/api/calendar/range', query_string={'days': SYNC_DAYS}),
+    'calendar.events': lambda ctx, c, u: c.get('/api/calendar/events', query_string=events_window()),
+    'settings.get': lambda ctx, c, u: c.get('/api/settings/work-hours'),
+    'settings.update': lambda ctx, c, u: c.put('/api/settings/work-hours', json={
+        'work_start_hour': 9, 'work_end_hour': ctx.rng.choice((16, 17, 18))}),
+    'plan.today': lambda ctx, c, u: c.get('/api/plan/today'),
+}
+
+
+def run_endpoint(ctx, name, requests, concurrency):
+    request = ENDPOINTS[name]
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        client, user_id = ctx.client()
+        started = time.perf_counter()
+        response = request(ctx, client, user_id)
+        # Drain streamed bodies such as /api/tasks/export inside the timing
+        response.get_data()
+        response.close()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            # 404 is a valid answer for next-task and today views on some
+            # users; any other 4xx (a 429 included) means the run is off
+            if response.status_code >= 400 and response.status_code != 404:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'throughput_rps': round(requests / wall, 1) if wall else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print p95 changes against a baseline run; return endpoints slower than `threshold` percent"""
+    regressions = []
+    print(f'\n{"endpoint":<24} {"base p95":>10} {"p95":>10} {"change":>8}')
+    for name, stats in results['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if not before or not before['p95_ms']:
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        flag = ''
+        if threshold is not None and change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<24} {before["p95_ms"]:>10.2f} {stats["p95_ms"]:>10.2f} {change:>+7.1f}%{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=200, help='tasks per user')
+    parser.add_argument('--events', type=int, default=6, help='calendar events per user per day')
+    parser.add_argument('--requests', type=int, default=300, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--fail-on-regression', type=float, metavar='PERCENT',
+                        help='exit non-zero when any p95 is this much slower than --compare')
+    args = parser.parse_args()
+
+    service = FakeCalendarService(latency=0)
+    # Route handlers build their Calendar client through this module attribute
+    routes.calendar_sync.calendar_client = fake_client_factory(service)
+    # Forced syncs measure the sync path, not the per-user rate limit
+    app.config.update(SYNC_RATE_LIMIT_BURST=10 ** 9, SYNC_RATE_LIMIT_PER_MINUTE=10 ** 9)
+    sync_guard.init_app(app)
+
+    print(f'seeding {args.users} users x {args.tasks} tasks, {args.events} events/day ...')
+    task_ids = seed(args.users, args.tasks, args.events, service)
+    ctx = Context(args.users, task_ids)
+
+    print(f'{"endpoint":<24} {"reqs":>6} {"errors":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>9}')
+    endpoints = {}
+    for name in args.endpoints:
+        stats = run_endpoint(ctx, name, args.requests, args.concurrency)
+        endpoints[name] = stats
+        print(f'{name:<24} {stats["requests"]:>6} {stats["errors"]:>6} {stats["p50_ms"]:>9.2f} '
+              f'{stats["p95_ms"]:>9.2f} {stats["p99_ms"]:>9.2f} {stats["throughput_rps"]:>9.1f}')
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'params': {key: getattr(args, key) for key in ('users', 'tasks', 'events', 'requests', 'concurrency')},
+        'endpoints': endpoints,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nwrote {args.output}')
+
+    failed = any(stats['errors'] for stats in endpoints.values())
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.fail_on_regression):
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
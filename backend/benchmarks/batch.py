@@ -0,0 +1,65 @@
+"""Compare the per-row task endpoints with POST /api/tasks/batch."""
+import sys
+
+from benchmarks.common import Timer, create_user, logged_in_client, report, reset_db
+
+
+def all_task_ids(client):
+    ids = []
+    params = {'limit': 500}
+    while True:
+        page = client.get('/api/tasks', query_string=params).json
+        ids.extend(task['id'] for task in page['tasks'])
+        if not page['next_cursor']:
+            return ids
+        params['cursor'] = page['next_cursor']
+
+
+def per_row(client, n):
+    with Timer() as t:
+        for i in range(n):
+            client.post('/api/tasks', json={'title': f'task {i}'})
+    report('per-row create', n, t.elapsed)
+
+    ids = all_task_ids(client)
+    with Timer() as t:
+        for task_id in ids:
+            client.put(f'/api/tasks/{task_id}', json={'completed': True})
+    report('per-row update', len(ids), t.elapsed)
+
+    with Timer() as t:
+        for task_id in ids:
+            client.delete(f'/api/tasks/{task_id}')
+    report('per-row delete', len(ids), t.elapsed)
+
+
+def batched(client, n):
+    ops = [{'op': 'create', 'data': {'title': f'task {i}'}} for i in range(n)]
+    with Timer() as t:
+        results = client.post('/api/tasks/batch', json={'operations': ops}).json['results']
+    report('batch create', n, t.elapsed)
+
+    ids = [r['task']['id'] for r in results]
+    ops = [{'op': 'update', 'id': task_id, 'data': {'completed': True}} for task_id in ids]
+    with Timer() as t:
+        client.post('/api/tasks/batch', json={'operations': ops})
+    report('batch update', n, t.elapsed)
+
+    ops = [{'op': 'delete', 'id': task_id} for task_id in ids]
+    with Timer() as t:
+        client.post('/api/tasks/batch', json={'operations': ops})
+    report('batch delete', n, t.elapsed)
+
+
+def main(sizes):
+    for n in sizes:
+        print(f'--- {n} operations ---')
+        reset_db()
+        create_user()
+        client = logged_in_client()
+        per_row(client, n)
+        batched(client, n)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
@@ -0,0 +1,52 @@
+"""Compare Python-side and SQL-aggregate capacity numbers for /api/calendar/today."""
+import random
+import sys
+from datetime import date
+
+from benchmarks.common import Timer, app, create_user, reset_db
+from database import db
+from models import CalendarSync, Task
+from routes.calendar_sync import capacity_query
+
+
+def python_sum(user_id, day):
+    sync = CalendarSync.query.filter_by(user_id=user_id, sync_date=day).first()
+    tasks = Task.query.filter_by(user_id=user_id, completed=False).all()
+    total = sum(task.duration_minutes for task in tasks)
+    return sync, total
+
+
+def sql_aggregate(user_id, day):
+    return capacity_query(user_id, day).first()
+
+
+def main(sizes, repeat=20):
+    rng = random.Random(0)
+    for n in sizes:
+        reset_db()
+        user_id = create_user()
+        with app.app_context():
+            db.session.add(CalendarSync(user_id=user_id, sync_date=date.today(),
+                                        total_minutes=480, available_minutes=300))
+            db.session.bulk_insert_mappings(Task, [
+                {'user_id': user_id, 'title': f'task {i}',
+                 'duration_minutes': rng.choice((15, 30, 60, 90)),
+                 'priority': rng.choice(('High', 'Medium', 'Low')),
+                 'completed': rng.random() < 0.5}
+                for i in range(n)
+            ])
+            db.session.commit()
+
+            timings = {}
+            for label, fn in (('python sum', python_sum), ('sql aggregate', sql_aggregate)):
+                with Timer() as t:
+                    for _ in range(repeat):
+                        fn(user_id, date.today())
+                        db.session.expunge_all()
+                timings[label] = t.elapsed / repeat * 1000
+
+        print(f'n={n:<8} ' + '  '.join(f'{label} {ms:8.2f} ms' for label, ms in timings.items()))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 10_000, 100_000])
@@ -0,0 +1,65 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the backend directory, e.g. `python -m benchmarks.batch`.
+Each script points the app at a throwaway SQLite file before importing it.
+"""
+import os
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix='flowfocus-bench-')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{os.path.join(_tmpdir, "bench.db")}')
+
+from app import create_app  # noqa: E402
+from database import db  # noqa: E402
+from models import User  # noqa: E402
+
+app = create_app()
+
+
+def reset_db():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+
+def create_user(user_id=1):
+    with app.app_context():
+        db.session.add(User(
+            id=user_id,
+            google_id=f'bench-{user_id}',
+            email=f'bench-{user_id}@example.com',
+            name=f'Bench {user_id}',
+            access_token='bench-token'
+        ))
+        db.session.commit()
+    return user_id
+
+
+def logged_in_client(user_id=1):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    return client
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def report(label, count, elapsed):
+    rate = count / elapsed if elapsed else float('inf')
+    print(f'{label:<40} {count:>8} ops  {elapsed * 1000:>10.1f} ms  {rate:>10.0f} ops/s')
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
@@ -0,0 +1,94 @@
+"""Throughput of mixed task reads and writes with N concurrent worker processes.
+
+    python -m benchmarks.db_concurrency --workers 1 4 8 --seconds 5
+    python -m benchmarks.db_concurrency --postgres postgresql://localhost/flowfocus_bench
+
+Compares SQLite with the default rollback journal against WAL, and
+PostgreSQL when a URL is given. Each worker is a separate process with its
+own engine, as under gunicorn.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+WRITE_RATIO = 0.3
+USERS = 8
+
+
+def configure(url, env):
+    os.environ['DATABASE_URL'] = url
+    os.environ.update(env)
+
+
+def setup(url, env):
+    configure(url, env)
+    from benchmarks.common import create_user, reset_db
+    reset_db()
+    for user_id in range(1, USERS + 1):
+        create_user(user_id)
+
+
+def worker(url, env, seconds, seed, results):
+    configure(url, env)
+    from benchmarks.common import logged_in_client
+
+    rng = random.Random(seed)
+    client = logged_in_client(seed % USERS + 1)
+    ops = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if rng.random() < WRITE_RATIO:
+            response = client.post('/api/tasks', json={'title': f'task {ops}'})
+        else:
+            response = client.get('/api/tasks', query_string={'limit': 50})
+        ops += 1
+        if response.status_code >= 500:
+            errors += 1
+    results.put((ops, errors))
+
+
+def run(label, url, env, workers, seconds):
+    context = multiprocessing.get_context('spawn')
+    process = context.Process(target=setup, args=(url, env))
+    process.start()
+    process.join()
+
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(url, env, seconds, i, results)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    ops = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    print(f'{label:<24} {workers:>3} workers  {ops:>8} ops  {ops / seconds:>9.0f} ops/s  {errors:>6} errors')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--postgres', help='PostgreSQL URL to include in the comparison')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='flowfocus-bench-')
+    backends = [
+        ('sqlite rollback journal', f'sqlite:///{os.path.join(tmpdir, "delete.db")}',
+         {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'}),
+        ('sqlite wal', f'sqlite:///{os.path.join(tmpdir, "wal.db")}', {}),
+    ]
+    if args.postgres:
+        backends.append(('postgresql', args.postgres, {}))
+
+    for label, url, env in backends:
+        for workers in args.workers:
+            run(label, url, env, workers, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
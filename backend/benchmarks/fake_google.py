@@ -0,0 +1,115 @@
+"""In-process stand-in for the Google Calendar API used by benchmarks.
+
+Supports the parts of events().list the app uses: full syncs with
+timeMin and timeMax, incremental syncs with syncToken (including 410 Gone for unknown
+tokens), cancelled events and paging.
+"""
+from datetime import datetime, timedelta, timezone
+from googleapiclient.errors import HttpError
+import random
+import threading
+import time
+
+
+class _Response(dict):
+    def __init__(self, status):
+        super().__init__(status=str(status))
+        self.status = status
+        self.reason = 'fake'
+
+
+class _Request:
+    def __init__(self, service, params):
+        self.service = service
+        self.params = params
+
+    def execute(self):
+        return self.service.handle(self.params)
+
+
+class FakeCalendarService:
+    """One calendar shared by every user of the service.
+
+    `latency` simulates the network round trip and `error_rate` the share
+    of calls that fail with a retryable 503.
+    """
+
+    def __init__(self, latency=0.05, error_rate=0.0, page_size=250, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.version = 0
+        self.store = {}  # id -> (version, item)
+
+    def add_event(self, event_id, start, end, summary='Meeting'):
+        with self.lock:
+            self.version += 1
+            self.store[event_id] = (self.version, {
+                'id': event_id,
+                'status': 'confirmed',
+                'summary': summary,
+                'start': {'dateTime': start.astimezone(timezone.utc).isoformat()},
+                'end': {'dateTime': end.astimezone(timezone.utc).isoformat()}
+            })
+
+    def cancel_event(self, event_id):
+        with self.lock:
+            self.version += 1
+            self.store[event_id] = (self.version, {'id': event_id, 'status': 'cancelled'})
+
+    def seed_days(self, first_day, days, per_day=6, tz=timezone.utc):
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            for i in range(per_day):
+                start = datetime(day.year, day.month, day.day, 9 + i, tzinfo=tz)
+                self.add_event(f'{day.isoformat()}-{i}', start, start + timedelta(minutes=30), f'Meeting {i}')
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        return _Request(self, params)
+
+    def handle(self, params):
+        with self.lock:
+            self.calls += 1
+            fail = self.rng.random() < self.error_rate
+            snapshot = sorted(self.store.values(), key=lambda entry: entry[0])
+            version = self.version
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise HttpError(_Response(503), b'backend error')
+
+        if 'syncToken' in params:
+            if not str(params['syncToken']).isdigit():
+                raise HttpError(_Response(410), b'sync token expired')
+            since = int(params['syncToken'])
+            items = [item for item_version, item in snapshot if item_version > since]
+        else:
+            time_min = datetime.fromisoformat(params['timeMin'])
+            time_max = datetime.fromisoformat(params['timeMax']) if 'timeMax' in params else None
+            items = [
+                item for _, item in snapshot
+                if item['status'] != 'cancelled'
+                and datetime.fromisoformat(item['end']['dateTime']) > time_min
+                and (time_max is None or datetime.fromisoformat(item['start']['dateTime']) < time_max)
+            ]
+
+        offset = int(params.get('pageToken', 0))
+        page = items[offset:offset + self.page_size]
+        if offset + self.page_size < len(items):
+            return {'items': page, 'nextPageToken': str(offset + self.page_size)}
+        return {'items': page, 'nextSyncToken': str(version)}
+
+
+class FakeCredentials:
+    token = None
+    expiry = None
+
+
+def fake_client_factory(service):
+    return lambda user: (service, FakeCredentials())
@@ -0,0 +1,53 @@
+"""Microbenchmark next-task selection against a full sort of the candidates."""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from scheduler import PRIORITY_RANK, TaskColumns, select_tasks
+from benchmarks.common import Timer
+
+PRIORITIES = list(PRIORITY_RANK)
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    return [
+        (i, rng.choice((15, 30, 45, 60, 90, 120)), rng.choice(PRIORITIES), base + timedelta(minutes=i))
+        for i in range(n)
+    ]
+
+
+def sort_baseline(rows, minutes_until_next):
+    fits = [r for r in rows if r[1] <= minutes_until_next]
+    return sorted(fits, key=lambda r: (PRIORITY_RANK.get(r[2], 4), -r[1]))[0][0]
+
+
+def main(sizes, repeat=5):
+    for n in sizes:
+        rows = make_rows(n)
+        with Timer() as t:
+            columns = TaskColumns.from_rows(rows)
+        build = t.elapsed
+
+        with Timer() as t:
+            for _ in range(repeat):
+                select_tasks(columns, minutes_until_next=60)
+        select = t.elapsed / repeat
+
+        with Timer() as t:
+            for _ in range(repeat):
+                select_tasks(columns, k=10, minutes_until_next=60)
+        top10 = t.elapsed / repeat
+
+        with Timer() as t:
+            for _ in range(repeat):
+                sort_baseline(rows, 60)
+        baseline = t.elapsed / repeat
+
+        print(f'n={n:<9} build {build * 1000:9.2f} ms  select {select * 1000:9.2f} ms  '
+              f'top-10 {top10 * 1000:9.2f} ms  full sort {baseline * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 10_000, 1_000_000])
@@ -0,0 +1,78 @@
+"""Task search latency at 100k tasks per user: full-text index vs LIKE scan.
+
+    python -m benchmarks.search [tasks_per_user] [users]
+"""
+import random
+import sys
+
+from benchmarks.common import Timer, app, create_user, logged_in_client, percentile, report, reset_db
+from database import db
+from models import Task
+import search
+
+WORDS = ('report budget review deploy migrate invoice meeting design draft email client release '
+         'refactor database backup audit hiring roadmap metrics onboarding security incident '
+         'newsletter contract forecast survey').split()
+QUERIES = {
+    'common word': 'report',
+    'two words': 'budget review',
+    'prefix': 'onboa',
+    'rare word': 'zebra',
+}
+
+
+def seed(tasks_per_user, users, rng):
+    reset_db()
+    for user_id in range(1, users + 1):
+        create_user(user_id)
+    with app.app_context():
+        for user_id in range(1, users + 1):
+            rows = []
+            for i in range(tasks_per_user):
+                title = ' '.join(rng.sample(WORDS, 3))
+                if i % 5000 == 0:
+                    title += ' zebra'
+                rows.append({'user_id': user_id, 'title': title,
+                             'description': ' '.join(rng.choices(WORDS, k=12))})
+            db.session.bulk_insert_mappings(Task, rows)
+        # bulk_insert_mappings skips the mapper hooks, so index in one pass
+        with Timer() as t:
+            search.rebuild(db.session.connection())
+        db.session.commit()
+    report('build index', tasks_per_user * users, t.elapsed)
+
+
+def like_scan(user_id, q):
+    query = Task.query.filter_by(user_id=user_id)
+    for term in search.query_terms(q):
+        pattern = f'%{term}%'
+        query = query.filter(db.or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+    return query.order_by(Task.created_at.desc(), Task.id.desc()).limit(21).all()
+
+
+def main(tasks_per_user=100000, users=2, repeat=30):
+    rng = random.Random(0)
+    print(f'--- {tasks_per_user} tasks x {users} users ---')
+    seed(tasks_per_user, users, rng)
+    client = logged_in_client(1)
+
+    for label, q in QUERIES.items():
+        latencies = []
+        for _ in range(repeat):
+            with Timer() as t:
+                response = client.get('/api/tasks/search', query_string={'q': q, 'limit': 20})
+            latencies.append(t.elapsed)
+        latencies.sort()
+        print(f'search {label:<14} p50 {percentile(latencies, 50) * 1000:7.2f} ms  '
+              f'p95 {percentile(latencies, 95) * 1000:7.2f} ms  ({len(response.json["tasks"])} results)')
+
+        with app.app_context():
+            with Timer() as t:
+                for _ in range(3):
+                    like_scan(1, q)
+        report(f'  LIKE scan {label}', 3, t.elapsed)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,49 @@
+"""Serialization throughput for a 10k task listing."""
+import json
+import sys
+
+from benchmarks.common import Timer, app, create_user, reset_db
+from database import db
+from models import Task
+import serialization
+
+
+def main(n=10_000, repeat=5):
+    reset_db()
+    user_id = create_user()
+    with app.app_context():
+        db.session.bulk_insert_mappings(Task, [
+            {'user_id': user_id, 'title': f'task {i}', 'description': 'x' * 40, 'duration_minutes': 30}
+            for i in range(n)
+        ])
+        db.session.commit()
+
+        def orm_to_dict():
+            tasks = Task.query.filter_by(user_id=user_id).all()
+            body = json.dumps([task.to_dict() for task in tasks])
+            db.session.expunge_all()
+            return body
+
+        def rows_fast():
+            rows = serialization.task_rows(Task.query.filter_by(user_id=user_id)).all()
+            return serialization.dumps(serialization.row_dicts(rows))
+
+        def rows_streamed():
+            rows = serialization.task_rows(Task.query.filter_by(user_id=user_id)).yield_per(1000)
+            with app.test_request_context():
+                response = serialization.stream_json_array(rows, chunk_size=1000)
+                return b''.join(response.response)
+
+        print(f'encoder: {"orjson" if serialization.orjson else "stdlib json"}')
+        for label, fn in (('orm to_dict + json.dumps', orm_to_dict),
+                          ('rows + fast dumps', rows_fast),
+                          ('rows streamed in chunks', rows_streamed)):
+            with Timer() as t:
+                for _ in range(repeat):
+                    fn()
+            per_call = t.elapsed / repeat
+            print(f'{label:<28} {per_call * 1000:8.1f} ms  {n / per_call:>10.0f} tasks/s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
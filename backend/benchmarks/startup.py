@@ -0,0 +1,68 @@
+"""Worker boot time: `python -X importtime -c "import wsgi"` against a budget.
+
+    python -m benchmarks.startup --budget-ms 800
+
+Runs the import in fresh interpreters, reports the median cumulative import
+time and the slowest top-level packages, and exits non-zero when the median
+exceeds the budget or when a module that should load lazily (the Google
+client libraries) is imported at startup.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ('google_auth_oauthlib', 'googleapiclient', 'google.oauth2')
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    """{module: (self_us, cumulative_us)} for one cold `import wsgi`"""
+    env = dict(os.environ, DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite://'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=800)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    median_ms = statistics.median(times['wsgi'][1] for times in runs) / 1000
+    print(f'import wsgi: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)')
+
+    last = runs[-1]
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative) in last.items()
+         if '.' not in name and name not in ('app', 'wsgi')),
+        key=lambda item: item[1], reverse=True
+    )
+    for name, cumulative in top_level[:args.top]:
+        print(f'  {name:<32} {cumulative / 1000:>8.1f} ms')
+
+    eager = sorted(name for name in last if name.startswith(LAZY_MODULES))
+    failed = False
+    if eager:
+        print(f'FAIL: imported at startup but should load on first use: {", ".join(eager[:5])}')
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f'FAIL: startup {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
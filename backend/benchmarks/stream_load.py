@@ -0,0 +1,94 @@
+"""Hold many idle /api/stream connections against a running server.
+
+Start the API and the stream process with live updates on and a shared
+broker first, e.g.
+
+    export LIVE_UPDATES=true EVENT_BROKER_URL=redis://localhost:6379/0
+    gunicorn wsgi:app &
+    GUNICORN_WORKER_CONNECTIONS=5000 gunicorn -c gunicorn_stream.conf.py &
+
+then run from the backend directory:
+
+    python -m benchmarks.stream_load --url http://localhost:5001 --api-url http://localhost:5000 --connections 2000
+
+Each connection authenticates with a session cookie signed with the app's
+SECRET_KEY for --user-id. After all connections are open, one task is
+created through the API and the script reports how many streams saw it.
+"""
+import argparse
+import asyncio
+import json
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+
+def session_cookie(user_id):
+    from app import create_app
+    app = create_app()
+    serializer = app.session_interface.get_signing_serializer(app)
+    return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={serializer.dumps({'user_id': user_id})}"
+
+
+async def open_stream(host, port, cookie, opened, received, deadline):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write((f'GET /api/stream HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n'
+                      'Accept: text/event-stream\r\n\r\n').encode())
+        await writer.drain()
+        status = await reader.readline()
+        if b' 200 ' not in status:
+            return 'rejected'
+        opened.append(time.perf_counter())
+        while time.perf_counter() < deadline:
+            line = await asyncio.wait_for(reader.readline(), timeout=deadline - time.perf_counter())
+            if not line:
+                return 'closed'
+            if line.startswith(b'event: task.created'):
+                received.append(time.perf_counter())
+                return 'ok'
+        return 'timeout'
+    except (OSError, asyncio.TimeoutError):
+        return 'error'
+
+
+def create_task(url, cookie):
+    body = json.dumps({'title': 'stream load test'}).encode()
+    request = urllib.request.Request(f'{url}/api/tasks', data=body, method='POST', headers={
+        'Content-Type': 'application/json', 'Cookie': cookie})
+    urllib.request.urlopen(request).read()
+
+
+async def main(args):
+    parts = urlsplit(args.url)
+    cookie = session_cookie(args.user_id)
+    opened, received = [], []
+    started = time.perf_counter()
+    deadline = started + args.hold
+    clients = [asyncio.create_task(open_stream(parts.hostname, parts.port or 80, cookie, opened, received, deadline))
+               for _ in range(args.connections)]
+
+    while len(opened) < args.connections and time.perf_counter() < deadline - 5:
+        await asyncio.sleep(0.1)
+    connected_after = time.perf_counter() - started
+    print(f'{len(opened)}/{args.connections} streams open after {connected_after:.2f}s')
+
+    published = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, create_task, args.api_url or args.url, cookie)
+    outcomes = await asyncio.gather(*clients)
+
+    delays = sorted(t - published for t in received)
+    print({outcome: outcomes.count(outcome) for outcome in set(outcomes)})
+    if delays:
+        print(f'fan-out to {len(delays)} streams: p50 {delays[len(delays) // 2] * 1000:.0f} ms, '
+              f'max {delays[-1] * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://localhost:5001', help='the stream process')
+    parser.add_argument('--api-url', default='http://localhost:5000', help='where the task is created')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--hold', type=float, default=60, help='seconds to keep connections open')
+    asyncio.run(main(parser.parse_args()))
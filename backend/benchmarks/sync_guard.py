@@ -0,0 +1,75 @@
+"""Hammer POST /api/calendar/sync and count how many calls reach the fake Calendar API.
+
+    python -m benchmarks.sync_guard --clients 20 --latency 0.2
+
+`burst` fires concurrent forced syncs for one user and range: one should
+reach Google and take a token, the rest are coalesced onto it. `loop` replays a frontend stuck in a sync
+loop: after the first call every answer should come from the stored rows.
+"""
+import argparse
+import threading
+from collections import Counter
+from datetime import date
+
+from benchmarks.common import Timer, app, create_user, logged_in_client, reset_db
+from benchmarks.fake_google import FakeCalendarService, fake_client_factory
+import routes.calendar_sync
+import sync_guard
+
+
+def post_sync(client, force):
+    response = client.post('/api/calendar/sync' + ('?force=true' if force else ''))
+    if response.status_code == 200:
+        return response.headers.get('X-Sync-Status')
+    return str(response.status_code)
+
+
+def burst(clients, user_id=1):
+    results = []
+    barrier = threading.Barrier(clients)
+
+    def worker():
+        client = logged_in_client(user_id)
+        barrier.wait()
+        results.append(post_sync(client, force=True))
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(results)
+
+
+def loop(requests, user_id=1):
+    client = logged_in_client(user_id)
+    return Counter(post_sync(client, force=False) for _ in range(requests))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=20, help='concurrent requests in the burst')
+    parser.add_argument('--requests', type=int, default=50, help='sequential requests in the loop')
+    parser.add_argument('--latency', type=float, default=0.2, help='fake Google latency in seconds')
+    parser.add_argument('--burst', type=int, default=5, help='SYNC_RATE_LIMIT_BURST')
+    parser.add_argument('--per-minute', type=float, default=6, help='SYNC_RATE_LIMIT_PER_MINUTE')
+    args = parser.parse_args()
+
+    app.config.update(SYNC_RATE_LIMIT_BURST=args.burst, SYNC_RATE_LIMIT_PER_MINUTE=args.per_minute)
+    service = FakeCalendarService(latency=args.latency)
+    service.seed_days(date.today(), days=7)
+    routes.calendar_sync.calendar_client = fake_client_factory(service)
+
+    for label, run in (('burst', lambda: burst(args.clients)), ('loop', lambda: loop(args.requests))):
+        reset_db()
+        create_user()
+        # A fresh token bucket and flight table per scenario
+        sync_guard.init_app(app)
+        calls = service.calls
+        with Timer() as timer:
+            statuses = run()
+        summary = '  '.join(f'{status}={count}' for status, count in sorted(statuses.items()))
+        print(f'{label:<6} google_calls={service.calls - calls:<4} {timer.elapsed * 1000:>8.1f} ms  {summary}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Application settings, read from the environment (and .env) once per process."""
+from dotenv import load_dotenv
+import os
+
+
+def env_flag(name, default='false'):
+    return os.environ.get(name, default).lower() == 'true'
+
+
+def load_config():
+    load_dotenv()
+    import db_config
+
+    database_url = db_config.database_url()
+    return {
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production'),
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': db_config.engine_options(database_url),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'CALENDAR_ALL_DAY_EVENTS_BUSY': env_flag('CALENDAR_ALL_DAY_EVENTS_BUSY'),
+        'SESSION_COOKIE_SAMESITE': 'None',
+        'SESSION_COOKIE_HTTPONLY': True,
+        'SESSION_COOKIE_SECURE': os.environ.get('FLASK_ENV') == 'production',
+        'QUERY_COUNT_HEADER': env_flag('QUERY_COUNT_HEADER'),
+        'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),
+        'PROFILE_SLOW_REQUESTS': env_flag('PROFILE_SLOW_REQUESTS'),
+        'PROFILE_SLOW_THRESHOLD': float(os.environ.get('PROFILE_SLOW_THRESHOLD', 0.5)),
+        'LIVE_UPDATES': env_flag('LIVE_UPDATES'),
+        'EVENT_BROKER_URL': os.environ.get('EVENT_BROKER_URL'),
+        'GOOGLE_CLIENT_ID': os.environ.get('GOOGLE_CLIENT_ID'),
+        'GOOGLE_CLIENT_SECRET': os.environ.get('GOOGLE_CLIENT_SECRET'),
+        # Base URL for Google API calls, e.g. a local stub in tests
+        'GOOGLE_API_ENDPOINT': os.environ.get('GOOGLE_API_ENDPOINT'),
+        'REDIRECT_URI': os.environ.get('REDIRECT_URI', 'http://localhost:5000/auth/google/callback'),
+        'FRONTEND_URL': os.environ.get('FRONTEND_URL', 'http://localhost:3000'),
+        'AUTO_MIGRATE': env_flag('AUTO_MIGRATE'),
+        'ARCHIVE_TASKS_AFTER_DAYS': int(os.environ.get('ARCHIVE_TASKS_AFTER_DAYS', 90)),
+        'ARCHIVE_SYNCS_AFTER_DAYS': int(os.environ.get('ARCHIVE_SYNCS_AFTER_DAYS', 30)),
+        'ARCHIVE_BATCH_SIZE': int(os.environ.get('ARCHIVE_BATCH_SIZE', 500)),
+        'SYNC_GUARD_URL': os.environ.get('SYNC_GUARD_URL'),
+        'SYNC_FRESHNESS_SECONDS': int(os.environ.get('SYNC_FRESHNESS_SECONDS', 60)),
+        'SYNC_RATE_LIMIT_BURST': int(os.environ.get('SYNC_RATE_LIMIT_BURST', 5)),
+        'SYNC_RATE_LIMIT_PER_MINUTE': float(os.environ.get('SYNC_RATE_LIMIT_PER_MINUTE', 6)),
+    }
@@ -0,0 +1,50 @@
+"""Database URL and engine tuning per backend.
+
+PostgreSQL gets an explicitly sized connection pool with pre-ping and
+recycling so connections dropped by the server are replaced instead of
+failing a request. SQLite is switched to WAL with a busy timeout so readers
+do not block the single writer and concurrent writers wait instead of
+failing with "database is locked".
+"""
+from sqlalchemy import event
+import os
+
+
+def database_url():
+    url = os.environ.get('DATABASE_URL', 'sqlite:///flowfocus.db')
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def engine_options(url):
+    if url.startswith('postgresql'):
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+        }
+    if url.startswith('sqlite'):
+        return {'connect_args': {'timeout': sqlite_busy_timeout() / 1000}}
+    return {}
+
+
+def sqlite_busy_timeout():
+    return int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')}")
+    cursor.execute(f"PRAGMA synchronous={os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+    cursor.execute(f'PRAGMA busy_timeout={sqlite_busy_timeout()}')
+    cursor.close()
+
+
+def init_app(app, db):
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    if url.startswith('sqlite') and ':memory:' not in url and url not in ('sqlite://', 'sqlite:///'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', _tune_sqlite)
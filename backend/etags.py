@@ -0,0 +1,66 @@
+"""Per-user data versions and conditional GET support.
+
+Every write to a user's tasks, settings or calendar bumps
+users.data_version in the same transaction. GET endpoints decorated with
+`conditional_get` derive a strong ETag from that version and answer a
+matching If-None-Match with 304 after a single primary-key lookup, without
+running the endpoint's own queries.
+"""
+from flask import g, make_response, request, session
+from functools import wraps
+from database import db
+from models import User
+from timezones import local_today
+from user_cache import load_user
+import hashlib
+
+
+def bump_data_version(user_id):
+    """Mark the user's data as changed; commit with the write it belongs to"""
+    User.query.filter_by(id=user_id).update(
+        {User.data_version: User.data_version + 1}, synchronize_session=False
+    )
+
+
+def bump_data_versions(user_ids):
+    """bump_data_version for many users in one UPDATE"""
+    if user_ids:
+        User.query.filter(User.id.in_(user_ids)).update(
+            {User.data_version: User.data_version + 1}, synchronize_session=False
+        )
+
+
+def current_data_version(user_id):
+    return db.session.query(User.data_version).filter_by(id=user_id).scalar()
+
+
+def version_and_today(user_id):
+    """(data_version, the user's local date) from one primary-key lookup"""
+    row = db.session.query(User.data_version, User.timezone).filter_by(id=user_id).first()
+    if row is None:
+        return None, local_today(None)
+    return row[0], local_today(row[1])
+
+
+def conditional_get(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session['user_id']
+        version, today = version_and_today(user_id)
+        # Responses also vary by query string and, for "today" views, by the user's date
+        raw = f'{user_id}:{version}:{request.full_path}:{today.isoformat()}'
+        etag = hashlib.sha1(raw.encode()).hexdigest()[:24]
+
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            # The body must come from the version the ETag names, not an
+            # older copy cached in this worker
+            g.user = load_user(user_id, data_version=version)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
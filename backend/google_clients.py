@@ -0,0 +1,101 @@
+"""Process-wide cache of Google discovery documents and per-user API clients.
+
+Discovery documents are parsed once per process. Calendar service clients
+are kept per user in a bounded LRU and rebuilt when the stored access token
+changes or expires; tokens refreshed by google-auth during a call are
+written back to the user row so the next request does not refresh again.
+The Google libraries are imported on first use so workers that only serve
+task requests never load them.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from database import db
+from user_cache import invalidate_cached_user
+import json
+import os
+import threading
+
+TOKEN_URI = 'https://oauth2.googleapis.com/token'
+CALENDAR_SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
+MAX_CACHED_CLIENTS = int(os.environ.get('GOOGLE_CLIENT_CACHE_SIZE', 256))
+# Evict a little before the real expiry so a cached client is never handed
+# out with a token that dies mid-request
+EXPIRY_SKEW = timedelta(minutes=1)
+
+_lock = threading.Lock()
+_discovery_docs = {}
+# (user_id, thread id) -> (access_token, token_expiry, service, credentials).
+# httplib2 connections are not thread-safe, so clients are never shared
+# across threads.
+_clients = OrderedDict()
+
+def discovery_document(service_name, version):
+    key = (service_name, version)
+    doc = _discovery_docs.get(key)
+    if doc is None:
+        from googleapiclient.discovery_cache import get_static_doc
+        doc = json.loads(get_static_doc(service_name, version))
+        _discovery_docs[key] = doc
+    return doc
+
+def build_service(service_name, version, credentials):
+    from googleapiclient.discovery import build_from_document
+    endpoint = current_app.config.get('GOOGLE_API_ENDPOINT')
+    return build_from_document(
+        discovery_document(service_name, version),
+        credentials=credentials,
+        client_options={'api_endpoint': endpoint} if endpoint else None
+    )
+
+def user_credentials(user):
+    from google.oauth2.credentials import Credentials
+    return Credentials(
+        token=user.access_token,
+        refresh_token=user.refresh_token,
+        token_uri=TOKEN_URI,
+        client_id=current_app.config.get('GOOGLE_CLIENT_ID'),
+        client_secret=current_app.config.get('GOOGLE_CLIENT_SECRET'),
+        scopes=CALENDAR_SCOPES,
+        expiry=user.token_expiry
+    )
+
+def _expired(token_expiry):
+    return token_expiry is not None and token_expiry - EXPIRY_SKEW <= datetime.utcnow()
+
+def calendar_client(user):
+    """Return (service, credentials) for the user's Calendar API, cached"""
+    key = (user.id, threading.get_ident())
+    with _lock:
+        entry = _clients.get(key)
+        if entry and entry[:2] == (user.access_token, user.token_expiry) and not _expired(entry[1]):
+            _clients.move_to_end(key)
+            return entry[2], entry[3]
+        _clients.pop(key, None)
+
+    credentials = user_credentials(user)
+    service = build_service('calendar', 'v3', credentials)
+
+    with _lock:
+        _clients[key] = (user.access_token, user.token_expiry, service, credentials)
+        while len(_clients) > MAX_CACHED_CLIENTS:
+            _clients.popitem(last=False)
+    return service, credentials
+
+def invalidate_user(user_id):
+    with _lock:
+        for key in [key for key in _clients if key[0] == user_id]:
+            del _clients[key]
+
+def persist_refreshed_token(user, credentials):
+    """Write a token refreshed during an API call back to the user row"""
+    if credentials.token and credentials.token != user.access_token:
+        user.access_token = credentials.token
+        user.token_expiry = credentials.expiry
+        db.session.commit()
+        invalidate_cached_user(user.id)
+        # Keep the client that holds the refreshed credentials
+        with _lock:
+            for key, entry in _clients.items():
+                if key[0] == user.id and entry[3] is credentials:
+                    _clients[key] = (user.access_token, user.token_expiry, entry[2], credentials)
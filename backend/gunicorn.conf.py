@@ -0,0 +1,30 @@
+"""Gunicorn settings for the API, picked up automatically by `gunicorn wsgi:app` run from this directory.
+
+Threaded workers: psycopg2, the Google client's ssl sockets and the
+per-thread caches in google_clients and instrumentation all assume real
+threads. /api/stream is not served here; with LIVE_UPDATES on it runs in
+its own gevent process, see gunicorn_stream.conf.py.
+"""
+import os
+
+wsgi_app = 'wsgi:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def on_starting(server):
+    """Bring the schema up to date once, in the master, before any worker serves requests"""
+    if os.environ.get('MIGRATE_ON_START', 'true').lower() != 'true':
+        return
+    from app import create_app
+    from database import db
+    from migrate import migrate
+
+    app = create_app()
+    for change in migrate(app):
+        server.log.info('migrate: %s', change)
+    # Forked workers must not inherit the master's pooled connections
+    with app.app_context():
+        db.engine.dispose()
@@ -0,0 +1,21 @@
+"""Gunicorn settings for the live-update stream: `gunicorn -c gunicorn_stream.conf.py`.
+
+Each open /api/stream holds a connection for as long as the dashboard is
+open, so this process runs gevent workers: one worker then serves
+thousands of idle streams. The master imports no app code, so nothing
+(ssl in particular) is loaded before the workers monkey-patch; wsgi_stream
+also makes psycopg2 cooperative. It only starts with LIVE_UPDATES=true,
+and migrations stay with the API process.
+"""
+import os
+
+wsgi_app = 'wsgi_stream:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 2000))
+
+
+def on_starting(server):
+    if os.environ.get('LIVE_UPDATES', 'false').lower() != 'true':
+        raise SystemExit('The stream process only runs with LIVE_UPDATES=true')
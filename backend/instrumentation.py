@@ -0,0 +1,333 @@
+"""Request, SQL and external-call instrumentation with a /metrics endpoint.
+
+init_app wires:
+
+* before/after request hooks recording latency per blueprint, endpoint and
+  status, plus error counts,
+* SQLAlchemy cursor listeners recording statement counts and SQL time, both
+  globally and per request (`g.query_count`, `g.sql_seconds`),
+* `external_call(service)` for timing outbound Google calls,
+* GET /metrics in the Prometheus text format, readable with
+  `Authorization: Bearer $METRICS_TOKEN` (or without one in debug mode), and
+* an optional sampling profiler (PROFILE_SLOW_REQUESTS) that keeps stack
+  samples for the slowest requests, served at GET /metrics/slow.
+
+Metrics are kept per process. With QUERY_COUNT_HEADER enabled (always on
+under TESTING) each response carries an X-Query-Count header, and
+`count_queries()` counts statements inside a `with` block.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from flask import Blueprint, Response, current_app, g, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import heapq
+import os
+import sys
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+_listening = False
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{_labels(key, le=bound)} {count}')
+                lines.append(f'{self.name}_bucket{_labels(key, le="+Inf")} {series[-1]}')
+                lines.append(f'{self.name}_sum{_labels(key)} {series[-2]:.6f}')
+                lines.append(f'{self.name}_count{_labels(key)} {series[-1]}')
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.lock = threading.Lock()
+        self.series = Counter()
+
+    def inc(self, amount=1, **labels):
+        with self.lock:
+            self.series[tuple(sorted(labels.items()))] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for key, value in sorted(self.series.items()):
+                lines.append(f'{self.name}{_labels(key)} {value}')
+        return lines
+
+
+def _labels(key, **extra):
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ''
+    body = ','.join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in pairs)
+    return '{' + body + '}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+request_latency = registry.register(Histogram(
+    'flowfocus_request_seconds', 'HTTP request latency by blueprint, endpoint and status'))
+request_errors = registry.register(CounterMetric(
+    'flowfocus_request_errors_total', 'Requests answered with a 5xx status or an unhandled exception'))
+request_queries = registry.register(Histogram(
+    'flowfocus_request_queries', 'SQL statements per request', buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100)))
+request_sql_time = registry.register(Histogram(
+    'flowfocus_request_sql_seconds', 'Time spent in SQL per request'))
+sql_latency = registry.register(Histogram(
+    'flowfocus_sql_statement_seconds', 'SQL statement latency by verb'))
+external_latency = registry.register(Histogram(
+    'flowfocus_external_call_seconds', 'Outbound API call latency by service and outcome'))
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+
+class count_queries:
+    def __enter__(self):
+        self.counter = QueryCounter()
+        _counters().append(self.counter)
+        return self.counter
+
+    def __exit__(self, *exc):
+        _counters().remove(self.counter)
+
+
+def _counters():
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    return _local.counters
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+    if has_app_context():
+        g.query_count = g.get('query_count', 0) + 1
+    for counter in _counters():
+        counter.count += 1
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    sql_latency.observe(elapsed, verb=statement.lstrip().split(' ', 1)[0].upper())
+    if has_app_context():
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+
+@contextmanager
+def external_call(service):
+    """Time an outbound call, e.g. `with external_call('calendar.events.list'):`"""
+    started = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        external_latency.observe(elapsed, service=service, outcome=outcome)
+        if has_app_context():
+            g.external_seconds = g.get('external_seconds', 0.0) + elapsed
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and keeps the slowest ones"""
+
+    def __init__(self, interval=0.005, threshold=0.5, keep=20):
+        self.interval = interval
+        self.threshold = threshold
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.active = {}  # thread id -> Counter of stacks
+        self.slowest = []  # min-heap of (seconds, sequence, report)
+        self.sequence = 0
+        self.sampler_pid = None
+
+    def _ensure_sampler(self):
+        # Started on first use in each process: threads do not survive the
+        # fork when gunicorn --preload imports the app in the master
+        if self.sampler_pid == os.getpid():
+            return
+        with self.lock:
+            if self.sampler_pid != os.getpid():
+                self.active = {}
+                self.sampler_pid = os.getpid()
+                threading.Thread(target=self._sample, name='slow-request-profiler', daemon=True).start()
+
+    def start(self):
+        self._ensure_sampler()
+        with self.lock:
+            self.active[threading.get_ident()] = Counter()
+
+    def finish(self, seconds, endpoint, path):
+        with self.lock:
+            samples = self.active.pop(threading.get_ident(), None)
+            if samples is None or seconds < self.threshold:
+                return
+            self.sequence += 1
+            report = {
+                'seconds': round(seconds, 4),
+                'endpoint': endpoint,
+                'path': path,
+                'samples': [{'stack': stack, 'count': count} for stack, count in samples.most_common(10)]
+            }
+            entry = (seconds, self.sequence, report)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def report(self):
+        with self.lock:
+            return [entry[2] for entry in sorted(self.slowest, reverse=True)]
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_stack(frame)] += 1
+
+
+def _stack(frame, depth=12):
+    parts = []
+    while frame is not None and len(parts) < depth:
+        code = frame.f_code
+        parts.append(f'{code.co_filename.rsplit("/", 1)[-1]}:{code.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return ' <- '.join(parts)
+
+
+bp = Blueprint('metrics', __name__)
+
+
+def _denied():
+    """None if the request may read metrics, else the error response.
+
+    Without METRICS_TOKEN the endpoints only exist in debug mode, so a
+    deployment never exposes them by accident.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return None if current_app.debug else (jsonify({'error': 'Not found'}), 404)
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+
+@bp.route('/metrics')
+def metrics():
+    denied = _denied()
+    if denied:
+        return denied
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@bp.route('/metrics/slow')
+def slow_requests():
+    denied = _denied()
+    if denied:
+        return denied
+    profiler = current_app.extensions.get('slow_request_profiler')
+    if profiler is None:
+        return jsonify({'error': 'Profiling disabled, set PROFILE_SLOW_REQUESTS=true'}), 404
+    return jsonify(profiler.report())
+
+
+def init_app(app):
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_execute)
+        _listening = True
+
+    profiler = None
+    if app.config.get('PROFILE_SLOW_REQUESTS'):
+        profiler = SlowRequestProfiler(threshold=app.config.get('PROFILE_SLOW_THRESHOLD', 0.5))
+        app.extensions['slow_request_profiler'] = profiler
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        if profiler:
+            profiler.start()
+
+    @app.after_request
+    def record_request(response):
+        g.response_status = response.status_code
+        if app.config.get('QUERY_COUNT_HEADER') or app.testing:
+            response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        started = g.pop('request_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        blueprint = request.blueprint or 'app'
+        status = getattr(g, 'response_status', None) or (500 if error else 200)
+
+        request_latency.observe(elapsed, blueprint=blueprint, endpoint=endpoint, status=status)
+        request_queries.observe(g.get('query_count', 0), blueprint=blueprint, endpoint=endpoint)
+        request_sql_time.observe(g.get('sql_seconds', 0.0), blueprint=blueprint, endpoint=endpoint)
+        if error is not None or status >= 500:
+            request_errors.inc(blueprint=blueprint, endpoint=endpoint)
+        if profiler:
+            profiler.finish(elapsed, endpoint, request.path)
+
+    app.register_blueprint(bp)
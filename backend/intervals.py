@@ -0,0 +1,86 @@
+"""Sorted, merged sets of half-open [start, end) intervals.
+
+Calendar intervals are stored as minutes since local midnight of the sync
+day, so busy/free time can be merged once at sync time and then read back
+without re-parsing event datetimes.
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+
+def minutes_since(day_start, value):
+    """Whole minutes elapsed from `day_start` to `value` (an aware datetime or ISO string).
+    
+    Both sides go through UTC: subtracting datetimes that share a tzinfo
+    gives the wall-clock difference, which is an hour off on DST days.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return int((value.astimezone(timezone.utc) - day_start.astimezone(timezone.utc)).total_seconds() // 60)
+
+
+def minute_time(day_start, minutes):
+    """The local datetime `minutes` elapsed minutes after `day_start`; inverse of minutes_since"""
+    return (day_start.astimezone(timezone.utc) + timedelta(minutes=minutes)).astimezone(day_start.tzinfo)
+
+
+class IntervalSet:
+    """Non-overlapping intervals kept as parallel sorted start/end lists"""
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                if end > self.ends[-1]:
+                    self.ends[-1] = end
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def from_merged(cls, pairs):
+        """Wrap pairs that are already sorted and merged, e.g. from storage"""
+        interval_set = cls()
+        for start, end in pairs:
+            interval_set.starts.append(start)
+            interval_set.ends.append(end)
+        return interval_set
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def total(self):
+        return sum(self.ends) - sum(self.starts)
+
+    def clip(self, lo, hi):
+        return IntervalSet.from_merged(
+            (max(start, lo), min(end, hi)) for start, end in self if start < hi and end > lo
+        )
+
+    def complement(self, lo, hi):
+        """Gaps between the intervals inside [lo, hi)"""
+        gaps = []
+        cursor = lo
+        for start, end in self.clip(lo, hi):
+            if start > cursor:
+                gaps.append((cursor, start))
+            cursor = end
+        if cursor < hi:
+            gaps.append((cursor, hi))
+        return IntervalSet.from_merged(gaps)
+
+    def next_start_after(self, point):
+        """First interval start strictly after `point`, or None"""
+        index = bisect_right(self.starts, point)
+        return self.starts[index] if index < len(self.starts) else None
+
+    def to_list(self):
+        return [[start, end] for start, end in self]
@@ -0,0 +1,189 @@
+"""One-time schema setup, run once per deploy instead of in every worker.
+
+    python migrate.py
+
+`gunicorn wsgi:app` runs it in the master before forking workers (see
+gunicorn.conf.py; MIGRATE_ON_START=false turns that off).
+
+Creates missing tables, then adds any model columns and indexes that an
+existing database does not have yet. Columns are added as nullable (or with
+their server default) so the step is safe to run against live data and to
+repeat.
+"""
+from sqlalchemy import inspect, text
+from database import db
+import models  # noqa: F401  registers every table on db.metadata
+import search
+
+
+def add_column_sql(bind, table, column):
+    preparer = bind.dialect.identifier_preparer
+    sql = (f'ALTER TABLE {preparer.format_table(table)} '
+           f'ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}')
+    if column.server_default is not None:
+        sql += f' DEFAULT {column.server_default.arg}'
+        if not column.nullable:
+            sql += ' NOT NULL'
+    return sql
+
+
+def add_columns(connection, table_name, column_names):
+    """Add the named model columns that an existing table lacks; returns the changes made"""
+    table = db.metadata.tables[table_name]
+    existing = {column['name'] for column in inspect(connection).get_columns(table_name)}
+    changes = []
+    for name in column_names:
+        if name not in existing:
+            connection.execute(text(add_column_sql(connection, table, table.c[name])))
+            changes.append(f'add column {table_name}.{name}')
+    return changes
+
+
+def calendar_sync_intervals(connection):
+    """Merged busy/free intervals stored with each sync row.
+
+    Rows synced before this step keep NULLs and are treated as unsynced
+    until the next sync rewrites them.
+    """
+    return add_columns(connection, 'calendar_syncs', ('busy_json', 'free_json'))
+
+
+def add_indexes(connection, table_name, index_names):
+    """Create the named model indexes that an existing table lacks; returns the changes made"""
+    table = db.metadata.tables[table_name]
+    existing = {index['name'] for index in inspect(connection).get_indexes(table_name)}
+    changes = []
+    for index in table.indexes:
+        if index.name in index_names and index.name not in existing:
+            index.create(connection)
+            changes.append(f'create index {index.name}')
+    return changes
+
+
+def incremental_calendar_sync(connection):
+    """The user's Google sync token; calendar_events itself comes from create_all"""
+    return add_columns(connection, 'users', ('calendar_sync_token',))
+
+
+def calendar_sync_horizon(connection):
+    """How far ahead the last full sync reached; NULL makes the next sync a full one"""
+    return add_columns(connection, 'users', ('calendar_synced_until',))
+
+
+def user_rollups_stale(connection):
+    """Marks users whose daily_stats wait for a rebuild"""
+    return add_columns(connection, 'users', ('rollups_stale_since',))
+
+
+def calendar_event_end_index(connection):
+    """Range reads filter events on end"""
+    return add_indexes(connection, 'calendar_events', ('ix_calendar_events_user_end',))
+
+
+def user_data_version(connection):
+    """Per-user version behind ETags; existing users start at the server default 0"""
+    return add_columns(connection, 'users', ('data_version',))
+
+
+def tasks_autoincrement(connection):
+    """Rebuild the SQLite tasks table with AUTOINCREMENT so archived task ids are never reused.
+
+    Without it SQLite hands out max(id) + 1, which repeats the id of a task
+    archived from the top of the table. The sequence starts past every id
+    in tasks and archived_tasks. PostgreSQL sequences never reuse ids.
+    """
+    if connection.dialect.name != 'sqlite':
+        return []
+    sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'")).scalar()
+    if 'AUTOINCREMENT' in sql.upper():
+        return []
+
+    table = db.metadata.tables['tasks']
+    columns = ', '.join(column['name'] for column in inspect(connection).get_columns('tasks')
+                        if column['name'] in table.c)
+    for index in inspect(connection).get_indexes('tasks'):
+        connection.execute(text(f'DROP INDEX {index["name"]}'))
+    connection.execute(text('ALTER TABLE tasks RENAME TO tasks_without_autoincrement'))
+    table.create(connection)
+    connection.execute(text(f'INSERT INTO tasks ({columns}) SELECT {columns} FROM tasks_without_autoincrement'))
+    connection.execute(text('DROP TABLE tasks_without_autoincrement'))
+
+    # create_all has already made archived_tasks if it was missing
+    last_id = connection.execute(text(
+        'SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM tasks UNION ALL SELECT MAX(task_id) FROM archived_tasks)'
+    )).scalar()
+    connection.execute(text("DELETE FROM sqlite_sequence WHERE name = 'tasks'"))
+    connection.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', :seq)"), {'seq': last_id or 0})
+    return ['rebuild table tasks with AUTOINCREMENT']
+
+
+# Schema changes to existing tables, oldest first. Each step is idempotent
+# and only runs against tables that existed before this migrate() call.
+STEPS = [
+    ('calendar_syncs', calendar_sync_intervals),
+    ('users', incremental_calendar_sync),
+    ('calendar_events', calendar_event_end_index),
+    ('users', user_data_version),
+    ('tasks', tasks_autoincrement),
+    ('users', calendar_sync_horizon),
+    ('users', user_rollups_stale),
+]
+
+
+def dedupe_calendar_syncs(connection):
+    """Keep the newest row per (user_id, sync_date) so the unique index can be built"""
+    connection.execute(text(
+        'DELETE FROM calendar_syncs WHERE id NOT IN '
+        '(SELECT MAX(id) FROM calendar_syncs GROUP BY user_id, sync_date)'
+    ))
+
+
+# Data fixes that must run before an index is created on an existing table
+BEFORE_INDEX = {
+    'uq_calendar_syncs_user_date': dedupe_calendar_syncs,
+}
+
+
+def migrate(app):
+    """Bring the database schema up to date with models.py; returns the changes made"""
+    changes = []
+    with app.app_context():
+        engine = db.engine
+        existing_tables = set(inspect(engine).get_table_names())
+        db.create_all()
+        changes.extend(f'create table {name}' for name in db.metadata.tables if name not in existing_tables)
+
+        with engine.begin() as connection:
+            for table_name, step in STEPS:
+                if table_name in existing_tables:
+                    changes.extend(step(connection))
+            
+            # Catch-all for columns and indexes without a step of their own
+            inspector = inspect(connection)
+            for table in db.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                columns = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in columns:
+                        connection.execute(text(add_column_sql(engine, table, column)))
+                        changes.append(f'add column {table.name}.{column.name}')
+
+                indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in indexes:
+                        if index.name in BEFORE_INDEX:
+                            BEFORE_INDEX[index.name](connection)
+                        index.create(connection)
+                        changes.append(f'create index {index.name}')
+            
+            if search.ensure_index(connection):
+                changes.append('create task search index')
+    return changes
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    changes = migrate(create_app())
+    print('\n'.join(changes) if changes else 'Schema is up to date')
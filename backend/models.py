@@ -1,5 +1,8 @@
 from database import db
 from datetime import datetime
+from intervals import IntervalSet
+import json
+import zlib
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -13,10 +16,27 @@ class User(db.Model):
     token_expiry = db.Column(db.DateTime)
     work_start_hour = db.Column(db.Integer, default=9)
     work_end_hour = db.Column(db.Integer, default=17)
+    # IANA name, e.g. 'Europe/Berlin'; NULL means timezones.DEFAULT_TIMEZONE
+    timezone = db.Column(db.String(64))
+    # Google Calendar nextSyncToken for incremental event syncs
+    calendar_sync_token = db.Column(db.Text)
+    # How far ahead (naive UTC) the last full sync pulled events; incremental
+    # syncs only see changes, so a full sync reruns before this runs out
+    calendar_synced_until = db.Column(db.DateTime)
+    # Set when daily_stats need rebuilding (e.g. after a timezone change);
+    # `python rollups.py --pending` and sync_worker.py clear it
+    rollups_stale_since = db.Column(db.DateTime)
+    # Bumped by every write to the user's tasks, settings or calendar; feeds
+    # the ETags on polled GET endpoints
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
     calendar_syncs = db.relationship('CalendarSync', backref='user', lazy=True, cascade='all, delete-orphan')
+    calendar_events = db.relationship('CalendarEvent', backref='user', lazy=True, cascade='all, delete-orphan')
+    daily_stats = db.relationship('DailyStat', backref='user', lazy=True, cascade='all, delete-orphan')
+    archived_tasks = db.relationship('ArchivedTask', backref='user', lazy=True, cascade='all, delete-orphan')
+    archived_calendar_syncs = db.relationship('ArchivedCalendarSync', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -25,11 +45,20 @@ class User(db.Model):
             'name': self.name,
             'work_start_hour': self.work_start_hour,
             'work_end_hour': self.work_end_hour,
+            'timezone': self.timezone,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Keyset pagination on GET /api/tasks walks this index newest-first
+        db.Index('ix_tasks_user_completed_created', 'user_id', 'completed', 'created_at', 'id'),
+        # Lets the archival job find old completed tasks without a table scan
+        db.Index('ix_tasks_completed_at', 'completed', 'completed_at'),
+        # Archived tasks keep their id, so SQLite must never hand it out again
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -56,6 +85,11 @@ class Task(db.Model):
 
 class CalendarSync(db.Model):
     __tablename__ = 'calendar_syncs'
+    __table_args__ = (
+        # One row per user and day; syncs upsert against it
+        db.Index('uq_calendar_syncs_user_date', 'user_id', 'sync_date', unique=True),
+        db.Index('ix_calendar_syncs_sync_date', 'sync_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -63,7 +97,21 @@ class CalendarSync(db.Model):
     total_minutes = db.Column(db.Integer, default=480)
     available_minutes = db.Column(db.Integer)
     events_json = db.Column(db.Text)
+    # Merged busy and free intervals as [[start, end], ...] in minutes since
+    # local midnight, computed once at sync time
+    busy_json = db.Column(db.Text)
+    free_json = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Last time a sync recomputed this day from freshly pulled events, even
+    # if nothing changed; POST /api/calendar/sync serves rows newer than
+    # SYNC_FRESHNESS_SECONDS without calling Google
+    synced_at = db.Column(db.DateTime)
+    
+    def busy_intervals(self):
+        return IntervalSet.from_merged(json.loads(self.busy_json or '[]'))
+    
+    def free_intervals(self):
+        return IntervalSet.from_merged(json.loads(self.free_json or '[]'))
     
     def to_dict(self):
         return {
@@ -72,6 +120,148 @@ class CalendarSync(db.Model):
             'sync_date': self.sync_date.isoformat(),
             'total_minutes': self.total_minutes,
             'available_minutes': self.available_minutes,
+            'events': json.loads(self.events_json or '[]'),
+            # The same list as a JSON string, for clients written against it
             'events_json': self.events_json,
+            'busy_intervals': json.loads(self.busy_json or '[]'),
+            'free_intervals': json.loads(self.free_json or '[]'),
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+class CalendarEvent(db.Model):
+    __tablename__ = 'calendar_events'
+    __table_args__ = (
+        db.Index('ix_calendar_events_user_start', 'user_id', 'start'),
+        # Range reads filter on end so long events are never cut off
+        db.Index('ix_calendar_events_user_end', 'user_id', 'end'),
+        db.UniqueConstraint('user_id', 'external_id', name='uq_calendar_events_user_external'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    external_id = db.Column(db.String(255), nullable=False)
+    summary = db.Column(db.String(500))
+    # Timed events are stored in naive UTC; all-day events keep their
+    # floating calendar dates at midnight
+    start = db.Column(db.DateTime, nullable=False)
+    end = db.Column(db.DateTime, nullable=False)
+    all_day = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        if self.all_day:
+            start, end = self.start.date().isoformat(), self.end.date().isoformat()
+        else:
+            start, end = self.start.isoformat() + 'Z', self.end.isoformat() + 'Z'
+        return {
+            'id': self.id,
+            'external_id': self.external_id,
+            'summary': self.summary,
+            'start': start,
+            'end': end,
+            'all_day': self.all_day
+        }
+
+class DailyStat(db.Model):
+    __tablename__ = 'daily_stats'
+    __table_args__ = (
+        db.Index('uq_daily_stats_user_date', 'user_id', 'stat_date', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    stat_date = db.Column(db.Date, nullable=False)
+    # Tasks completed that day (by completed_at in the user's timezone)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_minutes = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Incomplete task minutes when that day's calendar was last synced
+    planned_minutes = db.Column(db.Integer)
+    # Copied from the day's CalendarSync row
+    total_minutes = db.Column(db.Integer)
+    available_minutes = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'date': self.stat_date.isoformat(),
+            'completed_tasks': self.completed_tasks,
+            'completed_minutes': self.completed_minutes,
+            'planned_minutes': self.planned_minutes,
+            'total_minutes': self.total_minutes,
+            'available_minutes': self.available_minutes,
+            'accuracy': round(self.completed_minutes / self.available_minutes, 3)
+            if self.available_minutes else None
+        }
+
+class ArchivedTask(db.Model):
+    __tablename__ = 'archived_tasks'
+    __table_args__ = (
+        db.Index('ix_archived_tasks_user_created', 'user_id', 'created_at', 'task_id'),
+        db.Index('ix_archived_tasks_task_id', 'task_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # The id the task had in the tasks table; API responses keep using it
+    task_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    duration_minutes = db.Column(db.Integer)
+    priority = db.Column(db.String(20))
+    completed = db.Column(db.Boolean, default=True)
+    completed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.task_id,
+            'user_id': self.user_id,
+            'title': self.title,
+            'description': self.description,
+            'duration_minutes': self.duration_minutes,
+            'priority': self.priority,
+            'completed': self.completed,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived': True
+        }
+
+class ArchivedCalendarSync(db.Model):
+    __tablename__ = 'archived_calendar_syncs'
+    __table_args__ = (
+        db.Index('uq_archived_calendar_syncs_user_date', 'user_id', 'sync_date', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    sync_date = db.Column(db.Date, nullable=False)
+    total_minutes = db.Column(db.Integer)
+    available_minutes = db.Column(db.Integer)
+    # zlib-compressed JSON of {"events": ..., "busy": ..., "free": ...}
+    payload = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def pack(events_json, busy_json, free_json):
+        return zlib.compress(
+            ('{"events":%s,"busy":%s,"free":%s}' % (events_json or '[]', busy_json or '[]', free_json or '[]')).encode(),
+            9
+        )
+    
+    def to_dict(self):
+        payload = json.loads(zlib.decompress(self.payload)) if self.payload else {}
+        return {
+            'id': None,
+            'user_id': self.user_id,
+            'sync_date': self.sync_date.isoformat(),
+            'total_minutes': self.total_minutes,
+            'available_minutes': self.available_minutes,
+            'events': payload.get('events') or [],
+            'events_json': json.dumps(payload['events']) if 'events' in payload else None,
+            'busy_intervals': payload.get('busy', []),
+            'free_intervals': payload.get('free', []),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'archived': True
+        }
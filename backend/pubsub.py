@@ -0,0 +1,130 @@
+"""Per-user publish/subscribe for live updates on /api/stream.
+
+LocalBroker fans events out to subscribers in this process. Setting
+EVENT_BROKER_URL to a redis:// URL switches to RedisBroker so events reach
+subscribers on every worker and from separate processes such as
+sync_worker.py; any Redis-protocol server works, including a local
+stand-in during development. Without it, streams still notice changes made
+elsewhere through users.data_version, one heartbeat late. Both brokers use blocking waits with
+timeouts, which gevent patches into cooperative ones.
+"""
+from collections import defaultdict
+from flask import current_app
+import json
+import queue
+import threading
+
+
+class LocalSubscription:
+    def __init__(self, broker, user_id, max_queue):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=max_queue)
+
+    def get(self, timeout):
+        """Next event dict, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class LocalBroker:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = LocalSubscription(self, user_id, self.max_queue)
+        with self.lock:
+            self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id):
+        return bool(self.subscribers.get(user_id))
+
+    def publish(self, user_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # A stalled client must not hold up writers; it resyncs on reconnect
+                pass
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def channel(user_id):
+        return f'flowfocus:user:{user_id}'
+
+    def subscribe(self, user_id):
+        pubsub = self.client.pubsub()
+        pubsub.subscribe(self.channel(user_id))
+        return RedisSubscription(pubsub)
+
+    def has_subscribers(self, user_id):
+        return self.client.pubsub_numsub(self.channel(user_id))[0][1] > 0
+
+    def publish(self, user_id, event):
+        self.client.publish(self.channel(user_id), json.dumps(event, default=str))
+
+
+def init_app(app):
+    url = app.config.get('EVENT_BROKER_URL')
+    app.extensions['pubsub'] = RedisBroker(url) if url else LocalBroker()
+
+
+def broker():
+    return current_app.extensions['pubsub']
+
+
+def publish(user_id, event):
+    broker().publish(user_id, event)
+
+
+_notify_hooks = []
+
+
+def on_notify(hook):
+    """Register hook(user_id) to run after every notify(), e.g. to publish derived events"""
+    _notify_hooks.append(hook)
+    return hook
+
+
+def notify(user_id, event):
+    """Publish a change to the user's data, then any events derived from it"""
+    publish(user_id, event)
+    for hook in _notify_hooks:
+        hook(user_id)
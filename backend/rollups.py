@@ -0,0 +1,257 @@
+"""Incrementally maintained daily_stats rollups behind /api/analytics.
+
+Task writes record completion deltas per local day and apply them with a
+single upsert that adds to the stored counters; calendar syncs overwrite the
+day's capacity columns. Reads are then one indexed row per day instead of a
+scan over tasks. `python rollups.py` rebuilds the table from tasks and
+calendar_syncs in bulk, e.g. after an import or to repair drift;
+`--pending` only rebuilds users marked stale by a timezone change, which
+sync_worker.py also does after each run.
+"""
+from collections import defaultdict
+from datetime import timezone
+from sqlalchemy import bindparam, case
+from database import db, on_conflict_insert
+from etags import bump_data_versions
+from models import ArchivedCalendarSync, ArchivedTask, CalendarSync, DailyStat, Task, User
+from timezones import zone
+
+COUNTER_COLUMNS = ('completed_tasks', 'completed_minutes')
+CAPACITY_COLUMNS = ('total_minutes', 'available_minutes')
+BACKFILL_BATCH_SIZE = 1000
+
+
+def local_date(completed_at, tz):
+    """The user's local date for a naive-UTC completed_at"""
+    return completed_at.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+
+def _upsert(rows, columns, increment):
+    insert = on_conflict_insert()
+    if insert is None:
+        for row in rows:
+            stat = DailyStat.query.filter_by(user_id=row['user_id'], stat_date=row['stat_date']).first()
+            if not stat:
+                stat = DailyStat(user_id=row['user_id'], stat_date=row['stat_date'], completed_tasks=0, completed_minutes=0)
+                db.session.add(stat)
+            for column in columns:
+                setattr(stat, column, max((getattr(stat, column) or 0) + row[column], 0) if increment else row[column])
+        return
+
+    statement = insert(DailyStat).values(rows)
+    table = DailyStat.__table__
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'stat_date'],
+        set_={
+            column: table.c[column] + statement.excluded[column] if increment else statement.excluded[column]
+            for column in columns
+        }
+    )
+    db.session.execute(statement)
+
+
+def _subtract(rows):
+    """Apply deltas with negative parts, never taking a counter below zero.
+    
+    A task completed before its day had a rollup row can be uncompleted
+    later, so there may be less stored than the delta takes away.
+    """
+    insert = on_conflict_insert()
+    if insert is None:
+        _upsert(rows, COUNTER_COLUMNS, increment=True)
+        return
+
+    table = DailyStat.__table__
+    db.session.execute(insert(DailyStat).values([
+        {'user_id': row['user_id'], 'stat_date': row['stat_date'], 'completed_tasks': 0, 'completed_minutes': 0}
+        for row in rows
+    ]).on_conflict_do_nothing(index_elements=['user_id', 'stat_date']))
+    counters = {column: table.c[column] + bindparam(f'delta_{column}') for column in COUNTER_COLUMNS}
+    statement = table.update().where(
+        table.c.user_id == bindparam('row_user_id'), table.c.stat_date == bindparam('row_stat_date')
+    ).values({column: case((value < 0, 0), else_=value) for column, value in counters.items()})
+    db.session.execute(statement, [
+        {'row_user_id': row['user_id'], 'row_stat_date': row['stat_date'],
+         **{f'delta_{column}': row[column] for column in COUNTER_COLUMNS}}
+        for row in rows
+    ])
+
+
+class CompletionDeltas:
+    """Collects one user's per-day completion changes for a single upsert.
+
+    Call `before(task)` ahead of a change and `changed(task, snapshot)` after
+    it, or `removed(task)` before deleting; `flush()` writes the deltas into
+    the current transaction. Days losing completions are clamped at zero.
+    """
+
+    def __init__(self, user_id, timezone_name):
+        self.user_id = user_id
+        self.tz = zone(timezone_name)
+        self.deltas = defaultdict(lambda: [0, 0])
+
+    def add(self, completed_at, tasks, minutes):
+        delta = self.deltas[local_date(completed_at, self.tz)]
+        delta[0] += tasks
+        delta[1] += minutes
+
+    @staticmethod
+    def before(task):
+        return task.completed, task.completed_at, task.duration_minutes
+
+    def changed(self, task, snapshot):
+        was_completed, was_completed_at, was_minutes = snapshot
+        if was_completed and was_completed_at:
+            self.add(was_completed_at, -1, -(was_minutes or 0))
+        if task.completed and task.completed_at:
+            self.add(task.completed_at, 1, task.duration_minutes or 0)
+
+    def removed(self, task):
+        if task.completed and task.completed_at:
+            self.add(task.completed_at, -1, -(task.duration_minutes or 0))
+
+    def flush(self):
+        rows = [
+            {'user_id': self.user_id, 'stat_date': day, 'completed_tasks': tasks, 'completed_minutes': minutes}
+            for day, (tasks, minutes) in self.deltas.items() if tasks or minutes
+        ]
+        adding = [row for row in rows if row['completed_tasks'] >= 0 and row['completed_minutes'] >= 0]
+        if adding:
+            _upsert(adding, COUNTER_COLUMNS, increment=True)
+        if len(adding) < len(rows):
+            _subtract([row for row in rows if row not in adding])
+        self.deltas.clear()
+
+
+def record_capacity(user_id, syncs):
+    """Copy synced day capacity into daily_stats"""
+    rows = [
+        {
+            'user_id': user_id,
+            'stat_date': sync['sync_date'],
+            'completed_tasks': 0,
+            'completed_minutes': 0,
+            'total_minutes': sync['total_minutes'],
+            'available_minutes': sync['available_minutes'],
+        }
+        for sync in syncs
+    ]
+    if rows:
+        _upsert(rows, CAPACITY_COLUMNS, increment=False)
+
+
+def record_planned(user_id, day, planned_minutes):
+    """Capture the minutes of open tasks for `day`; returns whether the stored figure changed.
+    
+    Called on every sync covering the user's today, whether or not the
+    day's availability moved.
+    """
+    stored = db.session.query(DailyStat.planned_minutes).filter_by(user_id=user_id, stat_date=day).first()
+    if stored is not None and stored[0] == planned_minutes:
+        return False
+    _upsert([{'user_id': user_id, 'stat_date': day, 'completed_tasks': 0, 'completed_minutes': 0,
+              'planned_minutes': planned_minutes}], ('planned_minutes',), increment=False)
+    return True
+
+
+def stats_between(user_id, start, end):
+    """DailyStat rows for days in [start, end), via the (user_id, stat_date) index"""
+    return DailyStat.query.filter(
+        DailyStat.user_id == user_id,
+        DailyStat.stat_date >= start,
+        DailyStat.stat_date < end
+    ).order_by(DailyStat.stat_date).all()
+
+
+def backfill(user_ids=None, batch_size=BACKFILL_BATCH_SIZE):
+    """Rebuild daily_stats for the given users (default: everyone); returns rows written.
+    
+    Each batch is one transaction that starts by bumping the users'
+    data_version. That write locks their rows, and takes SQLite's write lock,
+    before anything is read. Task writes bump the same row before applying
+    completion deltas, so a delta lands either wholly before the rebuild
+    reads or on top of the rows it writes.
+    """
+    if user_ids is None:
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+
+    written = 0
+    for offset in range(0, len(user_ids), batch_size):
+        batch = user_ids[offset:offset + batch_size]
+        # End any read transaction so the lock below comes first in a fresh one
+        db.session.commit()
+        bump_data_versions(batch)
+        timezones = dict(db.session.query(User.id, User.timezone).filter(User.id.in_(batch)))
+        stats = {}
+
+        def stat(user_id, day):
+            key = (user_id, day)
+            if key not in stats:
+                stats[key] = {'user_id': user_id, 'stat_date': day, 'completed_tasks': 0, 'completed_minutes': 0,
+                              'planned_minutes': None, 'total_minutes': None, 'available_minutes': None}
+            return stats[key]
+
+        # Archived tasks and syncs still count towards history
+        completions = db.session.query(Task.user_id, Task.completed_at, Task.duration_minutes).filter(
+            Task.user_id.in_(batch), Task.completed == True, Task.completed_at.isnot(None)  # noqa: E712
+        ).union_all(db.session.query(
+            ArchivedTask.user_id, ArchivedTask.completed_at, ArchivedTask.duration_minutes
+        ).filter(ArchivedTask.user_id.in_(batch), ArchivedTask.completed_at.isnot(None))).yield_per(batch_size)
+        for user_id, completed_at, minutes in completions:
+            row = stat(user_id, local_date(completed_at, zone(timezones.get(user_id))))
+            row['completed_tasks'] += 1
+            row['completed_minutes'] += minutes or 0
+
+        # Hot rows last, so a day resynced after archival wins
+        for model in (ArchivedCalendarSync, CalendarSync):
+            syncs = db.session.query(
+                model.user_id, model.sync_date, model.total_minutes, model.available_minutes
+            ).filter(model.user_id.in_(batch)).yield_per(batch_size)
+            for user_id, sync_date, total_minutes, available_minutes in syncs:
+                row = stat(user_id, sync_date)
+                row['total_minutes'] = total_minutes
+                row['available_minutes'] = available_minutes
+
+        # Planned minutes were only ever captured live, so keep what is there
+        planned = dict(
+            ((user_id, day), minutes) for user_id, day, minutes in db.session.query(
+                DailyStat.user_id, DailyStat.stat_date, DailyStat.planned_minutes
+            ).filter(DailyStat.user_id.in_(batch), DailyStat.planned_minutes.isnot(None))
+        )
+        for key, minutes in planned.items():
+            stat(*key)['planned_minutes'] = minutes
+
+        DailyStat.query.filter(DailyStat.user_id.in_(batch)).delete(synchronize_session=False)
+        rows = list(stats.values())
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(DailyStat.__table__.insert(), rows[start:start + batch_size])
+        User.query.filter(User.id.in_(batch)).update({User.rollups_stale_since: None}, synchronize_session=False)
+        db.session.commit()
+        written += len(rows)
+    return written
+
+
+def backfill_pending(batch_size=BACKFILL_BATCH_SIZE):
+    """Rebuild daily_stats for users marked with rollups_stale_since; returns how many users"""
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+        User.rollups_stale_since.isnot(None)).order_by(User.id)]
+    if user_ids:
+        backfill(user_ids, batch_size)
+    return len(user_ids)
+
+
+if __name__ == '__main__':
+    import argparse
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Rebuild daily_stats from tasks and calendar syncs')
+    parser.add_argument('--user-id', type=int, action='append', dest='user_ids', help='limit to these users')
+    parser.add_argument('--pending', action='store_true', help='only users marked stale, e.g. after a timezone change')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.pending:
+            print(f'rebuilt daily_stats for {backfill_pending()} users')
+        else:
+            print(f'wrote {backfill(args.user_ids)} daily_stats rows')
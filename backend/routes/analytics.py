@@ -0,0 +1,61 @@
+from flask import Blueprint, jsonify, request, session
+from datetime import date, timedelta
+from routes.auth import current_user, login_required
+from etags import conditional_get
+from rollups import stats_between
+from timezones import local_today
+
+bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
+
+DEFAULT_DAYS = 7
+MAX_DAYS = 366
+
+@bp.route('/daily', methods=['GET'])
+@login_required
+@conditional_get
+def get_daily_stats():
+    """Completed vs planned and available minutes per day, from the daily_stats rollup"""
+    user_id = session['user_id']
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    days = request.args.get('days', DEFAULT_DAYS, type=int)
+    if not 1 <= days <= MAX_DAYS:
+        return jsonify({'error': f'days must be between 1 and {MAX_DAYS}'}), 400
+    
+    today = local_today(user.timezone)
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') \
+            else today - timedelta(days=days - 1)
+    except ValueError:
+        return jsonify({'error': 'start must be YYYY-MM-DD'}), 400
+    
+    stats = {stat.stat_date: stat.to_dict() for stat in stats_between(user_id, start, start + timedelta(days=days))}
+    daily = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        daily.append(stats.get(day) or {
+            'date': day.isoformat(),
+            'completed_tasks': 0,
+            'completed_minutes': 0,
+            'planned_minutes': None,
+            'total_minutes': None,
+            'available_minutes': None,
+            'accuracy': None
+        })
+    
+    completed_minutes = sum(day['completed_minutes'] for day in daily)
+    available_minutes = sum(day['available_minutes'] or 0 for day in daily)
+    return jsonify({
+        'start': start.isoformat(),
+        'days': days,
+        'daily': daily,
+        'totals': {
+            'completed_tasks': sum(day['completed_tasks'] for day in daily),
+            'completed_minutes': completed_minutes,
+            'planned_minutes': sum(day['planned_minutes'] or 0 for day in daily),
+            'available_minutes': available_minutes,
+            'accuracy': round(completed_minutes / available_minutes, 3) if available_minutes else None
+        }
+    })
@@ -1,22 +1,12 @@
-from flask import Blueprint, request, jsonify, session, redirect
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
+from flask import Blueprint, current_app, g, request, jsonify, session, redirect
 from models import User
 from database import db
-import os
-from dotenv import load_dotenv
+from google_clients import build_service, invalidate_user
+from user_cache import invalidate_cached_user, load_user
+from instrumentation import external_call
 from functools import wraps
 
-load_dotenv()
-
-if os.environ.get('FLASK_ENV') != 'production':
-    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
-
 bp = Blueprint('auth', __name__, url_prefix='/auth')
-GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
-GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
-REDIRECT_URI = os.environ.get('REDIRECT_URI', 'http://localhost:5000/auth/google/callback')
-FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
 SCOPES = [
     'openid',
@@ -25,6 +15,30 @@ SCOPES = [
     'https://www.googleapis.com/auth/calendar.readonly'
 ]
 
+def oauth_flow(state=None):
+    # google_auth_oauthlib is only needed for the login round trip, so
+    # workers serving task requests never import it
+    from google_auth_oauthlib.flow import Flow
+    return Flow.from_client_config(
+        {
+            "web": {
+                "client_id": current_app.config['GOOGLE_CLIENT_ID'],
+                "client_secret": current_app.config['GOOGLE_CLIENT_SECRET'],
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+            }
+        },
+        scopes=SCOPES,
+        state=state,
+        redirect_uri=current_app.config['REDIRECT_URI']
+    )
+
+def current_user():
+    """The logged-in User, resolved at most once per request"""
+    if 'user' not in g:
+        g.user = load_user(session['user_id'])
+    return g.user
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -36,18 +50,7 @@ def login_required(f):
 @bp.route('/google', methods=['POST'])
 def google_auth():
     try:
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": GOOGLE_CLIENT_ID,
-                    "client_secret": GOOGLE_CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                }
-            },
-            scopes=SCOPES,
-            redirect_uri=REDIRECT_URI
-        )
+        flow = oauth_flow()
         
         authorization_url, state = flow.authorization_url(
             access_type='offline',
@@ -65,26 +68,15 @@ def google_callback():
     try:
         state = session.get('state')
         
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": GOOGLE_CLIENT_ID,
-                    "client_secret": GOOGLE_CLIENT_SECRET,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                }
-            },
-            scopes=SCOPES,
-            state=state,
-            redirect_uri=REDIRECT_URI
-        )
+        flow = oauth_flow(state=state)
         
-        flow.fetch_token(authorization_response=request.url)
+        with external_call('oauth2.fetch_token'):
+            flow.fetch_token(authorization_response=request.url)
         credentials = flow.credentials
         
-        from googleapiclient.discovery import build
-        user_info_service = build('oauth2', 'v2', credentials=credentials)
-        user_info = user_info_service.userinfo().get().execute()
+        user_info_service = build_service('oauth2', 'v2', credentials)
+        with external_call('oauth2.userinfo.get'):
+            user_info = user_info_service.userinfo().get().execute()
         
         user = User.query.filter_by(google_id=user_info['id']).first()
         if not user:
@@ -104,18 +96,20 @@ def google_callback():
             user.token_expiry = credentials.expiry
         
         db.session.commit()
+        invalidate_user(user.id)
+        invalidate_cached_user(user.id)
         
         session['user_id'] = user.id
         session.permanent = True
         
-        return redirect(f'{FRONTEND_URL}/dashboard?auth=success')
+        return redirect(f'{current_app.config["FRONTEND_URL"]}/dashboard?auth=success')
     except Exception as e:
-        return redirect(f'{FRONTEND_URL}/login?error={str(e)}')
+        return redirect(f'{current_app.config["FRONTEND_URL"]}/login?error={str(e)}')
 
 @bp.route('/me')
 @login_required
 def get_current_user():
-    user = User.query.get(session['user_id'])
+    user = current_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
     return jsonify(user.to_dict())
@@ -1,131 +1,524 @@
-from flask import Blueprint, jsonify, session
-from models import CalendarSync, User, Task
-from database import db
-from datetime import datetime, date
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from routes.auth import login_required
+from flask import Blueprint, current_app, jsonify, request, session
+from models import ArchivedCalendarSync, CalendarEvent, CalendarSync, Task
+from database import db, on_conflict_insert
+from datetime import datetime, date, time, timedelta, timezone
+from routes.auth import current_user, login_required
+from routes.plan import invalidate_plan
+from pubsub import notify
+from intervals import IntervalSet, minutes_since
+from google_clients import calendar_client, persist_refreshed_token
+from user_cache import invalidate_cached_user
+from instrumentation import external_call
+from etags import bump_data_version, conditional_get
+from timezones import local_today, user_work_window, zone
+from rollups import record_capacity, record_planned
+from archive import include_archived
+from sync_guard import FlightFailed, RateLimited, sync_guard
 import json
-import os
-from zoneinfo import ZoneInfo
+import math
 
 bp = Blueprint('calendar', __name__, url_prefix='/api/calendar')
 
-def get_user_credentials(user):
-    return Credentials(
-        token=user.access_token,
-        refresh_token=user.refresh_token,
-        token_uri='https://oauth2.googleapis.com/token',
-        client_id=os.environ.get('GOOGLE_CLIENT_ID'),
-        client_secret=os.environ.get('GOOGLE_CLIENT_SECRET'),
-        scopes=['https://www.googleapis.com/auth/calendar.readonly']
-    )
+# How far back and ahead a full sync reaches. The horizon bounds the
+# expansion of recurring events that never end.
+SYNC_LOOKBACK_DAYS = 7
+SYNC_HORIZON_DAYS = 90
+# Incremental syncs never bring in unchanged events past the last full
+# sync's horizon, so a full sync reruns once that horizon is this many days
+# closer than SYNC_HORIZON_DAYS; syncs stop this far short of it
+SYNC_HORIZON_REFRESH_DAYS = 7
+# Longest range a single sync or range read covers
+MAX_SYNC_DAYS = 31
 
-@bp.route('/sync', methods=['POST'])
-@login_required
-def sync_calendar():
-    user_id = session['user_id']
-    user = User.query.get(user_id)
+def parse_event_time(value):
+    """Return (naive datetime, all_day) for a Google event start/end object"""
+    if 'dateTime' in value:
+        parsed = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        return parsed.astimezone(timezone.utc).replace(tzinfo=None), False
+    return datetime.combine(date.fromisoformat(value['date']), time()), True
+
+def pull_event_changes(user, service):
+    """Apply changed and cancelled events since the user's last sync token.
     
-    if not user or not user.access_token:
-        return jsonify({'error': 'User not authenticated with Google'}), 401
+    Without a token (first sync, or Google expired it with 410 Gone), or
+    once the last full sync's horizon is within SYNC_HORIZON_DAYS -
+    SYNC_HORIZON_REFRESH_DAYS, the user's stored events are replaced by a
+    full sync from SYNC_LOOKBACK_DAYS ago to SYNC_HORIZON_DAYS ahead.
+    Incremental changes starting past the horizon are not stored either.
+    Returns the number of events changed.
+    """
+    now = datetime.now(timezone.utc)
+    horizon = (now + timedelta(days=SYNC_HORIZON_DAYS)).replace(tzinfo=None)
+    refresh_at = horizon - timedelta(days=SYNC_HORIZON_REFRESH_DAYS)
+    params = {'calendarId': 'primary', 'singleEvents': True, 'maxResults': 2500}
+    if user.calendar_sync_token and user.calendar_synced_until and user.calendar_synced_until >= refresh_at:
+        params['syncToken'] = user.calendar_sync_token
+    else:
+        CalendarEvent.query.filter_by(user_id=user.id).delete()
+        params['timeMin'] = (now - timedelta(days=SYNC_LOOKBACK_DAYS)).isoformat()
+        params['timeMax'] = (now + timedelta(days=SYNC_HORIZON_DAYS)).isoformat()
+        user.calendar_synced_until = horizon
     
-    try:
-        credentials = get_user_credentials(user)
-        service = build('calendar', 'v3', credentials=credentials)
-        
-        work_start_hour = user.work_start_hour if user.work_start_hour is not None else 9
-        work_end_hour = user.work_end_hour if user.work_end_hour is not None else 17
-        
-        local_tz = ZoneInfo('America/Chicago')
-        today = date.today()
-        start_time = datetime.combine(today, datetime.min.time().replace(hour=work_start_hour)).replace(tzinfo=local_tz)
-        end_time = datetime.combine(today, datetime.min.time().replace(hour=work_end_hour)).replace(tzinfo=local_tz)
+    from googleapiclient.errors import HttpError
+    changed = 0
+    while True:
+        try:
+            with external_call('calendar.events.list'):
+                result = service.events().list(**params).execute()
+        except HttpError as e:
+            if e.resp.status == 410 and 'syncToken' in params:
+                db.session.rollback()
+                user.calendar_sync_token = None
+                return pull_event_changes(user, service)
+            raise
         
-        events_result = service.events().list(
-            calendarId='primary',
-            timeMin=start_time.isoformat(),
-            timeMax=end_time.isoformat(),
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        items = result.get('items', [])
+        external_ids = [item['id'] for item in items]
+        existing = {}
+        if external_ids:
+            rows = CalendarEvent.query.filter(
+                CalendarEvent.user_id == user.id,
+                CalendarEvent.external_id.in_(external_ids)
+            ).all()
+            existing = {row.external_id: row for row in rows}
         
-        events = events_result.get('items', [])
-        
-        # Calculate busy minutes
-        busy_minutes = 0
-        event_list = []
-        
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
+        for item in items:
+            row = existing.get(item['id'])
+            if item.get('status') != 'cancelled':
+                start, all_day = parse_event_time(item['start'])
+                end, _ = parse_event_time(item['end'])
+            if item.get('status') == 'cancelled' or start >= horizon:
+                if row:
+                    db.session.delete(row)
+                    del existing[item['id']]
+                    changed += 1
+                continue
             
-            if 'T' in start:
-                start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                
-                event_start = max(start_dt, start_time)
-                event_end = min(end_dt, end_time)
-                
-                if event_start < event_end:
-                    duration = (event_end - event_start).total_seconds() / 60
-                    busy_minutes += duration
-                    
-                    event_list.append({
-                        'summary': event.get('summary', 'Busy'),
-                        'start': event_start.isoformat(),
-                        'end': event_end.isoformat()
-                    })
+            if not row:
+                row = CalendarEvent(user_id=user.id, external_id=item['id'])
+                db.session.add(row)
+                existing[item['id']] = row
+            row.summary = item.get('summary', 'Busy')
+            row.start = start
+            row.end = end
+            row.all_day = all_day
+            changed += 1
         
-        total_minutes = (work_end_hour - work_start_hour) * 60
-        available_minutes = max(0, total_minutes - int(busy_minutes))
+        if result.get('nextPageToken'):
+            params['pageToken'] = result['nextPageToken']
+            continue
+        user.calendar_sync_token = result.get('nextSyncToken')
+        return changed
+
+def summarize_events(events, start_time, end_time, include_all_day=False):
+    """Clip stored events to the work window and merge them into busy/free time.
+    
+    Returns (event_list, busy, free) where busy and free are IntervalSets in
+    minutes since local midnight. All-day events only count as busy when
+    `include_all_day` is set.
+    """
+    local_tz = start_time.tzinfo
+    day_start = datetime.combine(start_time.date(), time()).replace(tzinfo=local_tz)
+    event_list = []
+    
+    for event in events:
+        if not event.all_day:
+            start_dt = event.start.replace(tzinfo=timezone.utc)
+            end_dt = event.end.replace(tzinfo=timezone.utc)
+        elif include_all_day:
+            start_dt = event.start.replace(tzinfo=local_tz)
+            end_dt = event.end.replace(tzinfo=local_tz)
+        else:
+            continue
         
-        sync = CalendarSync.query.filter_by(
-            user_id=user_id,
-            sync_date=today
-        ).first()
+        event_start = max(start_dt, start_time)
+        event_end = min(end_dt, end_time)
         
-        if sync:
-            sync.total_minutes = total_minutes
-            sync.available_minutes = available_minutes
-            sync.events_json = json.dumps(event_list)
+        if event_start < event_end:
+            event_list.append({
+                'summary': event.summary or 'Busy',
+                'start': event_start.astimezone(local_tz).isoformat(),
+                'end': event_end.astimezone(local_tz).isoformat()
+            })
+    
+    busy = IntervalSet(
+        (minutes_since(day_start, event['start']), minutes_since(day_start, event['end']))
+        for event in event_list
+    )
+    free = busy.complement(minutes_since(day_start, start_time), minutes_since(day_start, end_time))
+    return event_list, busy, free
+
+def events_between(user_id, start_time, end_time):
+    """Stored events overlapping [start_time, end_time), however long they run"""
+    # All-day events carry floating dates, so widen the range by a day and
+    # let the caller clip precisely. Filtering on end first lets the
+    # (user_id, end) index skip everything that finished before the range.
+    start_utc = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    end_utc = end_time.astimezone(timezone.utc).replace(tzinfo=None)
+    events = CalendarEvent.query.filter(
+        CalendarEvent.user_id == user_id,
+        CalendarEvent.end > start_utc - timedelta(days=1),
+        CalendarEvent.start < end_utc + timedelta(days=1)
+    ).order_by(CalendarEvent.start).all()
+    return [event for event in events
+            if event.all_day or (event.start < end_utc and event.end > start_utc)]
+
+def sync_window(sync):
+    """The (start, end) minutes a stored sync covers, or None if it has no intervals"""
+    intervals = sync.busy_intervals().to_list() + sync.free_intervals().to_list()
+    if not intervals:
+        return None
+    return min(start for start, _ in intervals), max(end for _, end in intervals)
+
+UPSERT_COLUMNS = ('total_minutes', 'available_minutes', 'events_json', 'busy_json', 'free_json')
+
+def sync_bounds(today):
+    """First and last day a sync can cover: the days every stored full sync still reaches"""
+    return (today - timedelta(days=SYNC_LOOKBACK_DAYS - 1),
+            today + timedelta(days=SYNC_HORIZON_DAYS - SYNC_HORIZON_REFRESH_DAYS - 1))
+
+def events_by_day(events, tz, start, days):
+    """Bucket events by the local days in [start, start + days) they overlap, in one pass"""
+    buckets = [[] for _ in range(days)]
+    for event in events:
+        if event.all_day:
+            first = event.start.date()
+            last = (event.end - timedelta(microseconds=1)).date()
         else:
-            sync = CalendarSync(
-                user_id=user_id,
-                sync_date=today,
-                total_minutes=total_minutes,
-                available_minutes=available_minutes,
-                events_json=json.dumps(event_list)
-            )
-            db.session.add(sync)
-        
+            first = event.start.replace(tzinfo=timezone.utc).astimezone(tz).date()
+            last = (event.end - timedelta(microseconds=1)).replace(tzinfo=timezone.utc).astimezone(tz).date()
+        for offset in range(max(0, (first - start).days), min(days - 1, (last - start).days) + 1):
+            buckets[offset].append(event)
+    return buckets
+
+def syncs_between(user_id, start, end):
+    """CalendarSync rows for days in [start, end), via the (user_id, sync_date) index"""
+    return CalendarSync.query.filter(
+        CalendarSync.user_id == user_id,
+        CalendarSync.sync_date >= start,
+        CalendarSync.sync_date < end
+    ).order_by(CalendarSync.sync_date).all()
+
+def upsert_syncs(rows):
+    """Insert or update CalendarSync rows keyed on (user_id, sync_date)"""
+    insert = on_conflict_insert()
+    if insert is None:
+        for row in rows:
+            sync = CalendarSync.query.filter_by(user_id=row['user_id'], sync_date=row['sync_date']).first()
+            if sync:
+                for column in UPSERT_COLUMNS:
+                    setattr(sync, column, row[column])
+            else:
+                db.session.add(CalendarSync(**row))
+        return
+    
+    statement = insert(CalendarSync).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=['user_id', 'sync_date'],
+        set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+    )
+    db.session.execute(statement)
+
+def mark_synced(user_id, start, end):
+    """Stamp synced_at on the user's rows for [start, end), changed or not"""
+    CalendarSync.query.filter(
+        CalendarSync.user_id == user_id,
+        CalendarSync.sync_date >= start,
+        CalendarSync.sync_date < end
+    ).update({'synced_at': datetime.utcnow()}, synchronize_session=False)
+
+def planned_task_minutes(user_id):
+    return db.session.query(db.func.coalesce(db.func.sum(Task.duration_minutes), 0)).filter(
+        Task.user_id == user_id, Task.completed == False  # noqa: E712
+    ).scalar()
+
+def capture_planned(user, start, end):
+    """record_planned for the user's today when [start, end) covers it; returns whether it changed"""
+    today = local_today(user.timezone)
+    if not start <= today < end:
+        return False
+    return record_planned(user.id, today, planned_task_minutes(user.id))
+
+def sync_range(user, start, days, client=None):
+    """Pull calendar changes once and upsert the user's CalendarSync rows for `days` days from `start`.
+    
+    `client` is a (service, credentials) pair and defaults to the cached
+    Calendar client for the user. Events for the whole range come from one
+    indexed query and are split per day; every day is recomputed and only
+    days whose availability changed are written. Returns the rows ordered by date. Raises ValueError
+    for days outside `sync_bounds`, whose events were never pulled.
+    """
+    earliest, latest = sync_bounds(local_today(user.timezone))
+    if start < earliest or start + timedelta(days=days - 1) > latest:
+        raise ValueError(f'Calendar syncs cover {earliest.isoformat()} to {latest.isoformat()}')
+    
+    service, credentials = client or calendar_client(user)
+    pull_event_changes(user, service)
+    persist_refreshed_token(user, credentials)
+    
+    end = start + timedelta(days=days)
+    existing = {sync.sync_date: sync for sync in syncs_between(user.id, start, end)}
+    
+    # Always rebuilt from stored events: an earlier sync of another range may
+    # have pulled changes for these days without rewriting their rows
+    first_window = user_work_window(user, start)
+    events = events_between(user.id, first_window.start, user_work_window(user, end - timedelta(days=1)).end)
+    buckets = events_by_day(events, first_window.tz, start, days)
+    include_all_day = current_app.config.get('CALENDAR_ALL_DAY_EVENTS_BUSY', False)
+    
+    rows = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        work_window = user_work_window(user, day)
+        event_list, busy, free = summarize_events(buckets[offset], work_window.start, work_window.end, include_all_day)
+        row = {
+            'user_id': user.id,
+            'sync_date': day,
+            'total_minutes': work_window.total_minutes,
+            'available_minutes': free.total(),
+            'events_json': json.dumps(event_list),
+            'busy_json': json.dumps(busy.to_list()),
+            'free_json': json.dumps(free.to_list())
+        }
+        sync = existing.get(day)
+        if sync and all(getattr(sync, column) == row[column] for column in UPSERT_COLUMNS):
+            continue
+        rows.append(row)
+    
+    if not rows:
+        mark_synced(user.id, start, end)
+        if capture_planned(user, start, end):
+            bump_data_version(user.id)
         db.session.commit()
-        
-        return jsonify(sync.to_dict())
+        invalidate_cached_user(user.id)
+        return list(existing.values())
+    
+    upsert_syncs(rows)
+    mark_synced(user.id, start, end)
+    record_capacity(user.id, rows)
+    capture_planned(user, start, end)
+    bump_data_version(user.id)
+    db.session.commit()
+    invalidate_cached_user(user.id)
+    invalidate_plan(user.id)
+    
+    for row in rows:
+        notify(user.id, {
+            'type': 'calendar.synced',
+            'sync_date': row['sync_date'].isoformat(),
+            'total_minutes': row['total_minutes'],
+            'available_minutes': row['available_minutes']
+        })
+    
+    return syncs_between(user.id, start, end)
+
+def sync_day(user, day, client=None):
+    """Pull calendar changes and upsert the user's CalendarSync row for `day`"""
+    return sync_range(user, day, 1, client)[0]
+
+def parse_range(args, today, bounds=None):
+    """(start, days) from ?start=YYYY-MM-DD&days=N, defaulting to `today` and 1 day.
+    
+    With `bounds` (first, last day), the whole range must fall inside them.
+    """
+    start = date.fromisoformat(args['start']) if args.get('start') else today
+    days = int(args.get('days', 1))
+    if not 1 <= days <= MAX_SYNC_DAYS:
+        raise ValueError(f'days must be between 1 and {MAX_SYNC_DAYS}')
+    if bounds and (start < bounds[0] or start + timedelta(days=days - 1) > bounds[1]):
+        raise ValueError(f'start and days must stay between {bounds[0].isoformat()} and {bounds[1].isoformat()}')
+    return start, days
+
+def fresh_syncs(user, start, days, max_age):
+    """Stored rows for the range if every day was synced in the last `max_age` seconds, else None"""
+    syncs = syncs_between(user.id, start, start + timedelta(days=days))
+    if len(syncs) != days:
+        return None
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    for sync in syncs:
+        if sync.synced_at is None or sync.synced_at < cutoff:
+            return None
+        # Work hours or timezone changed since; the stored window is stale
+        work_window = user_work_window(user, sync.sync_date)
+        if sync_window(sync) != (work_window.start_minute, work_window.end_minute):
+            return None
+    return syncs
+
+def sync_response(syncs, status):
+    """The sync body: one row for a plain POST, {'syncs': [...]} for an explicit range"""
+    if 'start' not in request.args and 'days' not in request.args:
+        response = jsonify(syncs[0])
+    else:
+        response = jsonify({'syncs': syncs})
+    response.headers['X-Sync-Status'] = status
+    return response
+
+@bp.route('/sync', methods=['POST'])
+@login_required
+def sync_calendar():
+    """Sync the range from Google, unless it was synced within SYNC_FRESHNESS_SECONDS.
+    
+    ?force=true skips the freshness check. Concurrent calls for the same
+    range share one upstream sync, and only that sync takes from the user's
+    rate limit. X-Sync-Status says which path answered: fresh, synced or
+    coalesced.
+    """
+    user_id = session['user_id']
+    user = current_user()
+    
+    if not user or not user.access_token:
+        return jsonify({'error': 'User not authenticated with Google'}), 401
+    
+    try:
+        today = local_today(user.timezone)
+        start, days = parse_range(request.args, today, sync_bounds(today))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.args.get('force', 'false').lower() != 'true':
+        syncs = fresh_syncs(user, start, days, current_app.config['SYNC_FRESHNESS_SECONDS'])
+        if syncs:
+            return sync_response([sync.to_dict() for sync in syncs], 'fresh')
+    
+    guard = sync_guard()
+    
+    def leader():
+        allowed, retry_after = guard.limiter.allow(user_id)
+        if not allowed:
+            raise RateLimited(retry_after)
+        return [sync.to_dict() for sync in sync_range(user, start, days)]
+    
+    def follower():
+        # Shared backend: another worker ran the sync and stored the rows
+        return [sync.to_dict() for sync in syncs_between(user_id, start, start + timedelta(days=days))]
+    
+    try:
+        syncs, shared = guard.flight.run(f'{user_id}:{start.isoformat()}:{days}', leader, follower)
+        return sync_response(syncs, 'coalesced' if shared else 'synced')
+    except RateLimited as e:
+        retry_after = math.ceil(e.retry_after)
+        response = jsonify({'error': str(e), 'retry_after': retry_after})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    except FlightFailed as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def capacity_query(user_id, day):
+    """One aggregate over incomplete tasks, joined to the day's sync row"""
+    def count_where(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+    
+    return db.session.query(
+        CalendarSync,
+        db.func.coalesce(db.func.sum(Task.duration_minutes), 0),
+        db.func.count(Task.id),
+        count_where(Task.priority == 'High'),
+        count_where(Task.priority == 'Medium'),
+        count_where(Task.priority == 'Low'),
+        count_where(Task.duration_minutes <= CalendarSync.available_minutes)
+    ).outerjoin(
+        Task,
+        db.and_(Task.user_id == CalendarSync.user_id, Task.completed == False)  # noqa: E712
+    ).filter(
+        CalendarSync.user_id == user_id,
+        CalendarSync.sync_date == day
+    ).group_by(CalendarSync.id)
+
 @bp.route('/today', methods=['GET'])
 @login_required
+@conditional_get
 def get_today_calendar():
     """Get today's calendar sync data"""
     user_id = session['user_id']
-    today = date.today()
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
     
-    sync = CalendarSync.query.filter_by(
-        user_id=user_id,
-        sync_date=today
-    ).first()
+    row = capacity_query(user_id, local_today(user.timezone)).first()
     
-    if not sync:
+    if not row:
         return jsonify({'error': 'No sync data for today. Please sync first.'}), 404
     
-    # Calculate task time
-    tasks = Task.query.filter_by(user_id=user_id, completed=False).all()
-    total_task_minutes = sum(task.duration_minutes for task in tasks)
+    sync, total_task_minutes, task_count, high, medium, low, tasks_that_fit = row
     
     data = sync.to_dict()
     data['total_task_minutes'] = total_task_minutes
     data['capacity_exceeded'] = total_task_minutes > sync.available_minutes
+    data['overflow_minutes'] = max(0, total_task_minutes - sync.available_minutes)
+    data['task_count'] = task_count
+    data['tasks_by_priority'] = {'High': high, 'Medium': medium, 'Low': low}
+    data['tasks_that_fit'] = tasks_that_fit
     
     return jsonify(data)
+
+@bp.route('/events', methods=['GET'])
+@login_required
+def get_events():
+    """List stored events overlapping [start, end), ISO datetimes"""
+    user_id = session['user_id']
+    
+    try:
+        start_time = datetime.fromisoformat(request.args['start'])
+        end_time = datetime.fromisoformat(request.args['end'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'start and end must be ISO datetimes'}), 400
+    
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    local_tz = zone(user.timezone)
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=local_tz)
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=local_tz)
+    
+    events = events_between(user_id, start_time, end_time)
+    return jsonify([event.to_dict() for event in events])
+
+@bp.route('/range', methods=['GET'])
+@login_required
+@conditional_get
+def get_calendar_range():
+    """Stored availability for `days` days from `start`, one row per synced day.
+    
+    Any range can be read back, archived history included; `missing_dates`
+    only lists the days a sync can still fill.
+    """
+    user_id = session['user_id']
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    try:
+        today = local_today(user.timezone)
+        start, days = parse_range(request.args, today)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    syncs = syncs_between(user_id, start, start + timedelta(days=days))
+    if include_archived(request.args):
+        hot_dates = {sync.sync_date for sync in syncs}
+        archived = ArchivedCalendarSync.query.filter(
+            ArchivedCalendarSync.user_id == user_id,
+            ArchivedCalendarSync.sync_date >= start,
+            ArchivedCalendarSync.sync_date < start + timedelta(days=days)
+        ).all()
+        syncs = sorted(syncs + [sync for sync in archived if sync.sync_date not in hot_dates],
+                       key=lambda sync: sync.sync_date)
+    synced_dates = {sync.sync_date for sync in syncs}
+    earliest, latest = sync_bounds(today)
+    missing = [day for day in (start + timedelta(days=offset) for offset in range(days))
+               if day not in synced_dates and earliest <= day <= latest]
+    
+    return jsonify({
+        'start': start.isoformat(),
+        'days': days,
+        'syncs': [sync.to_dict() for sync in syncs],
+        'available_minutes': sum(sync.available_minutes or 0 for sync in syncs),
+        'missing_dates': [day.isoformat() for day in missing]
+    })
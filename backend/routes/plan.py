@@ -0,0 +1,73 @@
+from flask import Blueprint, jsonify, session
+from models import Task, CalendarSync
+from routes.auth import current_user, login_required
+from scheduler import TaskColumns, pack_tasks
+from intervals import IntervalSet, minute_time
+from etags import current_data_version
+from timezones import local_today, user_work_window
+
+bp = Blueprint('plan', __name__, url_prefix='/api/plan')
+
+# user_id -> (date, data_version, plan). Holds one day per user. Entries are
+# dropped by invalidate_plan on local writes and ignored once the user's
+# data_version moves on, which also catches writes made by other workers.
+_plan_cache = {}
+
+def invalidate_plan(user_id):
+    _plan_cache.pop(user_id, None)
+
+def build_plan(user, today):
+    work_window = user_work_window(user, today)
+    day_start = work_window.day_start
+    
+    def to_iso(minutes):
+        return minute_time(day_start, minutes).isoformat()
+    
+    sync = CalendarSync.query.filter_by(user_id=user.id, sync_date=today).first()
+    if sync and sync.free_json is not None:
+        gaps = sync.free_intervals()
+    else:
+        gaps = IntervalSet([(work_window.start_minute, work_window.end_minute)])
+    
+    tasks = Task.query.filter_by(user_id=user.id, completed=False).all()
+    tasks_by_id = {task.id: task for task in tasks}
+    columns = TaskColumns.from_rows(
+        (task.id, task.duration_minutes, task.priority, task.created_at) for task in tasks
+    )
+    placements, unscheduled = pack_tasks(columns, gaps)
+    
+    return {
+        'date': today.isoformat(),
+        'synced': sync is not None,
+        'free_gaps': [
+            {'start': to_iso(start), 'end': to_iso(end), 'minutes': end - start}
+            for start, end in gaps
+        ],
+        'free_minutes': gaps.total(),
+        'scheduled': [
+            {'task': tasks_by_id[task_id].to_dict(), 'start': to_iso(start), 'end': to_iso(end)}
+            for task_id, start, end in placements
+        ],
+        'scheduled_minutes': sum(end - start for _, start, end in placements),
+        'unscheduled': [tasks_by_id[task_id].to_dict() for task_id in unscheduled]
+    }
+
+@bp.route('/today', methods=['GET'])
+@login_required
+def get_today_plan():
+    """Pack incomplete tasks into today's free calendar gaps"""
+    user_id = session['user_id']
+    user = current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    today = local_today(user.timezone)
+    
+    version = current_data_version(user_id)
+    cached = _plan_cache.get(user_id)
+    if cached and cached[:2] == (today, version):
+        return jsonify(cached[2])
+    
+    plan = build_plan(user, today)
+    _plan_cache[user_id] = (today, version, plan)
+    
+    return jsonify(plan)
@@ -1,23 +1,31 @@
 from flask import Blueprint, jsonify, request, session
-from models import User
+from datetime import datetime
 from database import db
-from routes.auth import login_required
+from models import CalendarSync
+from routes.auth import current_user, login_required
+from user_cache import invalidate_cached_user
+from etags import bump_data_version, conditional_get
+from routes.plan import invalidate_plan
+from timezones import DEFAULT_TIMEZONE, is_valid_timezone, local_today
 
 bp = Blueprint('settings', __name__, url_prefix='/api/settings')
 
 @bp.route('/work-hours', methods=['GET'])
 @login_required
+@conditional_get
 def get_work_hours():
     """Get user's work hours settings"""
-    user_id = session['user_id']
-    user = User.query.get(user_id)
+    user = current_user()
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     return jsonify({
         'work_start_hour': user.work_start_hour,
-        'work_end_hour': user.work_end_hour
+        'work_end_hour': user.work_end_hour,
+        'timezone': user.timezone or DEFAULT_TIMEZONE,
+        # False until the user picks a zone, so the client can suggest its own
+        'timezone_set': user.timezone is not None
     })
 
 @bp.route('/work-hours', methods=['PUT'])
@@ -25,7 +33,7 @@ def get_work_hours():
 def update_work_hours():
     """Update user's work hours settings"""
     user_id = session['user_id']
-    user = User.query.get(user_id)
+    user = current_user()
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -44,13 +52,33 @@ def update_work_hours():
     if work_start_hour >= work_end_hour:
         return jsonify({'error': 'Start hour must be before end hour'}), 400
     
+    timezone = data.get('timezone', user.timezone)
+    if timezone is not None and not is_valid_timezone(timezone):
+        return jsonify({'error': 'timezone must be an IANA name such as Europe/Berlin'}), 400
+    
     # Update user
     user.work_start_hour = work_start_hour
     user.work_end_hour = work_end_hour
+    timezone_changed = timezone != user.timezone
+    if timezone_changed:
+        user.timezone = timezone
+        # Completions are bucketed by local date; sync_worker.py re-buckets
+        # this user's history outside the request
+        user.rollups_stale_since = datetime.utcnow()
+        # Stored day rows are in the old zone; the next sync rebuilds them
+        # from stored events without a full Google pull
+        CalendarSync.query.filter(
+            CalendarSync.user_id == user_id,
+            CalendarSync.sync_date >= local_today(timezone)
+        ).delete()
+    bump_data_version(user_id)
     db.session.commit()
+    invalidate_cached_user(user_id)
+    invalidate_plan(user_id)
     
     return jsonify({
         'message': 'Work hours updated successfully',
         'work_start_hour': user.work_start_hour,
-        'work_end_hour': user.work_end_hour
+        'work_end_hour': user.work_end_hour,
+        'timezone': user.timezone or DEFAULT_TIMEZONE
     })
@@ -0,0 +1,67 @@
+from flask import Blueprint, Response, current_app, jsonify, session
+from routes.auth import login_required
+from pubsub import broker
+from etags import current_data_version
+from serialization import dumps
+
+bp = Blueprint('stream', __name__, url_prefix='/api')
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 5000
+
+def format_event(event):
+    return b'event: ' + event['type'].encode() + b'\ndata: ' + dumps(event) + b'\n\n'
+
+@bp.route('/stream', methods=['GET'])
+@login_required
+def stream():
+    """Server-sent events with task, calendar and next-task deltas.
+    
+    Each open stream holds a worker connection, so the endpoint only exists
+    with LIVE_UPDATES on, in an app built to serve it (SERVE_STREAM: the
+    gevent process from gunicorn_stream.conf.py, or the dev server). Changes
+    that never reach this worker's broker, e.g. from sync_worker.py without
+    EVENT_BROKER_URL, show up as a data.changed event once the heartbeat
+    sees users.data_version move.
+    """
+    if not (current_app.config.get('LIVE_UPDATES') and current_app.config.get('SERVE_STREAM')):
+        return jsonify({'error': 'Live updates are disabled'}), 404
+    
+    user_id = session['user_id']
+    app = current_app._get_current_object()
+    heartbeat = app.config.get('STREAM_HEARTBEAT_SECONDS', HEARTBEAT_SECONDS)
+    
+    def data_version():
+        # A short app context per check so the stream never holds a connection
+        with app.app_context():
+            return current_data_version(user_id)
+    
+    version = data_version()
+    subscription = broker().subscribe(user_id)
+
+    def generate():
+        nonlocal version
+        delivered = False
+        try:
+            yield f'retry: {RETRY_MILLISECONDS}\n\n'.encode()
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is not None:
+                    delivered = True
+                    yield format_event(event)
+                    continue
+                latest = data_version()
+                if latest != version and not delivered:
+                    yield format_event({'type': 'data.changed', 'data_version': latest})
+                else:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield b': keepalive\n\n'
+                version = latest
+                delivered = False
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -1,17 +1,180 @@
 from flask import Blueprint, request, jsonify, session
-from models import Task, CalendarSync
+from models import ArchivedTask, Task, CalendarSync
 from database import db
-from datetime import datetime, date
+from datetime import datetime
 from routes.auth import login_required
+from routes.plan import invalidate_plan
+from scheduler import TaskColumns, select_tasks
+from intervals import minutes_since
+from serialization import TASK_COLUMNS, TASK_FIELDS, row_dicts, stream_json_array, task_rows
+from etags import bump_data_version, conditional_get
+from pubsub import broker, notify, on_notify, publish
+from timezones import user_work_window
+from user_cache import load_user
+from rollups import CompletionDeltas
+from search import MAX_QUERY_LENGTH, search_tasks
+from archive import ARCHIVED_TASK_COLUMNS, include_archived
+import base64
+import binascii
 
 bp = Blueprint('tasks', __name__, url_prefix='/api/tasks')
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 10000
+MAX_NEXT_TASKS = 50
+EXPORT_CHUNK_SIZE = 1000
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# user_id -> id of the last next task pushed to that user's streams
+_last_next_task = {}
+
+def encode_cursor(row):
+    raw = f'{row.created_at.isoformat()}|{row.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    created_at, task_id = raw.rsplit('|', 1)
+    return datetime.fromisoformat(created_at), int(task_id)
+
+def build_task(user_id, data):
+    return Task(
+        user_id=user_id,
+        title=data['title'],
+        description=data.get('description', ''),
+        duration_minutes=data.get('duration_minutes', 30),
+        priority=data.get('priority', 'Medium')
+    )
+
+def completion_deltas(user_id):
+    user = load_user(user_id)
+    return CompletionDeltas(user_id, user.timezone if user else None)
+
+def apply_task_changes(task, data):
+    if 'title' in data:
+        task.title = data['title']
+    if 'description' in data:
+        task.description = data['description']
+    if 'duration_minutes' in data:
+        task.duration_minutes = data['duration_minutes']
+    if 'priority' in data:
+        task.priority = data['priority']
+    if 'completed' in data:
+        task.completed = data['completed']
+        if data['completed']:
+            task.completed_at = datetime.utcnow()
+        else:
+            task.completed_at = None
+
+def list_filters(model, user_id, completed, priority, cursor):
+    """WHERE clauses for one page of GET /api/tasks; `model` is Task or ArchivedTask"""
+    task_id = model.task_id if model is ArchivedTask else model.id
+    filters = [model.user_id == user_id]
+    if completed is not None:
+        filters.append(model.completed == completed)
+    if priority:
+        filters.append(model.priority == priority)
+    if cursor:
+        cursor_created_at, cursor_id = cursor
+        filters.append(db.or_(
+            model.created_at < cursor_created_at,
+            db.and_(model.created_at == cursor_created_at, task_id < cursor_id)
+        ))
+    return filters
+
 @bp.route('', methods=['GET'])
 @login_required
+@conditional_get
 def get_tasks():
+    """List tasks newest-first, one keyset page at a time"""
     user_id = session['user_id']
-    tasks = Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).all()
-    return jsonify([task.to_dict() for task in tasks])
+    
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+    
+    completed = request.args.get('completed')
+    if completed is not None:
+        if completed.lower() not in ('true', 'false'):
+            return jsonify({'error': 'completed must be true or false'}), 400
+        completed = completed.lower() == 'true'
+    
+    priority = request.args.get('priority')
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor)
+        except (ValueError, binascii.Error):
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # Fetch one extra row to know whether another page exists
+    filters = list_filters(Task, user_id, completed, priority, cursor)
+    if include_archived(request.args) and completed is not False:
+        page = db.union_all(
+            db.select(*TASK_COLUMNS, db.literal(False).label('archived')).where(*filters),
+            db.select(*ARCHIVED_TASK_COLUMNS, db.literal(True).label('archived')).where(
+                *list_filters(ArchivedTask, user_id, completed, priority, cursor)
+            )
+        ).subquery()
+        fields = TASK_FIELDS + ('archived',)
+        rows = db.session.execute(db.select(*page.c).order_by(
+            page.c.created_at.desc(), page.c.id.desc()
+        ).limit(limit + 1)).all()
+    else:
+        rows = task_rows(Task.query).filter(*filters).order_by(
+            Task.created_at.desc(), Task.id.desc()
+        ).limit(limit + 1).all()
+        fields = TASK_FIELDS
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    
+    return jsonify({
+        'tasks': row_dicts(rows[:limit], fields),
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/search', methods=['GET'])
+@login_required
+@conditional_get
+def search():
+    """Tasks matching ?q= in title or description, best match first"""
+    user_id = session['user_id']
+    
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+    if len(q) > MAX_QUERY_LENGTH:
+        return jsonify({'error': f'q must be at most {MAX_QUERY_LENGTH} characters'}), 400
+    
+    limit = request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+    limit = min(limit, MAX_SEARCH_PAGE_SIZE)
+    
+    query = search_tasks(Task.query.filter_by(user_id=user_id), user_id, q)
+    if query is None:
+        return jsonify({'tasks': [], 'next_offset': None})
+    
+    # Fetch one extra row to know whether another page exists
+    rows = task_rows(query).offset(offset).limit(limit + 1).all()
+    return jsonify({
+        'tasks': row_dicts(rows[:limit]),
+        'next_offset': offset + limit if len(rows) > limit else None
+    })
+
+@bp.route('/export', methods=['GET'])
+@login_required
+def export_tasks():
+    """Stream every task as one chunked JSON array"""
+    user_id = session['user_id']
+    rows = task_rows(Task.query.filter_by(user_id=user_id)).order_by(
+        Task.created_at.desc(), Task.id.desc()
+    ).yield_per(EXPORT_CHUNK_SIZE)
+    return stream_json_array(rows, chunk_size=EXPORT_CHUNK_SIZE)
 
 @bp.route('', methods=['POST'])
 @login_required
@@ -22,24 +185,25 @@ def create_task():
     if not data.get('title'):
         return jsonify({'error': 'Title is required'}), 400
     
-    task = Task(
-        user_id=user_id,
-        title=data['title'],
-        description=data.get('description', ''),
-        duration_minutes=data.get('duration_minutes', 30),
-        priority=data.get('priority', 'Medium')
-    )
+    task = build_task(user_id, data)
     
     db.session.add(task)
+    bump_data_version(user_id)
     db.session.commit()
+    invalidate_plan(user_id)
+    
+    task_data = task.to_dict()
+    notify(user_id, {'type': 'task.created', 'task': task_data})
     
-    return jsonify(task.to_dict()), 201
+    return jsonify(task_data), 201
 
 @bp.route('/<int:task_id>', methods=['GET'])
 @login_required
 def get_task(task_id):
     user_id = session['user_id']
     task = Task.query.filter_by(id=task_id, user_id=user_id).first()
+    if not task and include_archived(request.args):
+        task = ArchivedTask.query.filter_by(task_id=task_id, user_id=user_id).first()
     
     if not task:
         return jsonify({'error': 'Task not found'}), 404
@@ -57,24 +221,20 @@ def update_task(task_id):
     
     data = request.get_json()
     
-    if 'title' in data:
-        task.title = data['title']
-    if 'description' in data:
-        task.description = data['description']
-    if 'duration_minutes' in data:
-        task.duration_minutes = data['duration_minutes']
-    if 'priority' in data:
-        task.priority = data['priority']
-    if 'completed' in data:
-        task.completed = data['completed']
-        if data['completed']:
-            task.completed_at = datetime.utcnow()
-        else:
-            task.completed_at = None
-    
+    deltas = completion_deltas(user_id)
+    snapshot = deltas.before(task)
+    apply_task_changes(task, data)
+    deltas.changed(task, snapshot)
+    # Bumping first locks the user row, which rollups.backfill also takes
+    bump_data_version(user_id)
+    deltas.flush()
     db.session.commit()
+    invalidate_plan(user_id)
     
-    return jsonify(task.to_dict())
+    task_data = task.to_dict()
+    notify(user_id, {'type': 'task.updated', 'task': task_data})
+    
+    return jsonify(task_data)
 
 @bp.route('/<int:task_id>', methods=['DELETE'])
 @login_required
@@ -85,72 +245,179 @@ def delete_task(task_id):
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
+    deltas = completion_deltas(user_id)
+    deltas.removed(task)
+    bump_data_version(user_id)
+    deltas.flush()
     db.session.delete(task)
     db.session.commit()
+    invalidate_plan(user_id)
+    
+    notify(user_id, {'type': 'task.deleted', 'id': task_id})
     
     return jsonify({'message': 'Task deleted successfully'})
 
+@bp.route('/batch', methods=['POST'])
+@login_required
+def batch_tasks():
+    """Apply a list of create/update/delete operations in one transaction"""
+    user_id = session['user_id']
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object with an operations list'}), 400
+    operations = data.get('operations')
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} operations per batch'}), 400
+    
+    # Resolve every referenced task with a single IN (...) lookup
+    task_ids = {op.get('id') for op in operations
+                if isinstance(op, dict) and op.get('op') in ('update', 'delete')
+                and isinstance(op.get('id'), int)}
+    existing = {}
+    if task_ids:
+        rows = Task.query.filter(Task.user_id == user_id, Task.id.in_(task_ids)).all()
+        existing = {task.id: task for task in rows}
+    
+    results = []
+    created = []
+    deltas = completion_deltas(user_id)
+    
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            results.append({'index': index, 'status': 400, 'error': 'Operation must be an object'})
+            continue
+        
+        kind = op.get('op')
+        payload = op.get('data') or {}
+        if not isinstance(payload, dict):
+            results.append({'index': index, 'status': 400, 'error': 'data must be an object'})
+            continue
+
+        if kind == 'create':
+            if not payload.get('title'):
+                results.append({'index': index, 'status': 400, 'error': 'Title is required'})
+                continue
+            task = build_task(user_id, payload)
+            created.append(task)
+            results.append({'index': index, 'status': 201, 'task': task})
+        elif kind in ('update', 'delete'):
+            task = existing.get(op.get('id'))
+            if not task:
+                results.append({'index': index, 'status': 404, 'error': 'Task not found'})
+                continue
+            if kind == 'update':
+                snapshot = deltas.before(task)
+                apply_task_changes(task, payload)
+                deltas.changed(task, snapshot)
+                results.append({'index': index, 'status': 200, 'task': task})
+            else:
+                del existing[task.id]
+                deltas.removed(task)
+                db.session.delete(task)
+                results.append({'index': index, 'status': 200, 'id': task.id})
+        else:
+            results.append({'index': index, 'status': 400, 'error': f'Unknown op: {kind}'})
+    
+    db.session.add_all(created)
+    # Flush so created tasks carry their new ids, then serialize before the
+    # commit expires every loaded row
+    db.session.flush()
+    for result in results:
+        if 'task' in result:
+            result['task'] = result['task'].to_dict()
+    bump_data_version(user_id)
+    deltas.flush()
+    db.session.commit()
+    invalidate_plan(user_id)
+    
+    # One summary event instead of a message per row
+    notify(user_id, {
+        'type': 'tasks.batch',
+        'created': [r['task']['id'] for r in results if r['status'] == 201],
+        'updated': [r['task']['id'] for r in results if r['status'] == 200 and 'task' in r],
+        'deleted': [r['id'] for r in results if r['status'] == 200 and 'id' in r]
+    })
+    
+    return jsonify({'results': results})
+
+def recommend_tasks(user_id, k=1):
+    """Return (task dicts, warning) for the best next tasks, or ([], None)"""
+    rows = db.session.query(
+        Task.id, Task.duration_minutes, Task.priority, Task.created_at
+    ).filter_by(user_id=user_id, completed=False).all()
+    
+    if not rows:
+        return [], None
+    
+    columns = TaskColumns.from_rows(rows)
+    minutes_until_next = None
+    available_minutes = None
+    
+    user = load_user(user_id)
+    if not user:
+        return [], None
+    work_window = user_work_window(user)
+    sync = CalendarSync.query.filter_by(user_id=user_id, sync_date=work_window.day).first()
+    
+    if sync and sync.busy_json is not None:
+        now_minutes = minutes_since(work_window.day_start, datetime.now(work_window.tz))
+        next_busy_start = sync.busy_intervals().next_start_after(now_minutes)
+        
+        if next_busy_start is not None:
+            minutes_until_next = next_busy_start - now_minutes
+        else:
+            available_minutes = sync.available_minutes
+    
+    task_ids, no_fit = select_tasks(
+        columns,
+        k=k,
+        minutes_until_next=minutes_until_next,
+        available_minutes=available_minutes
+    )
+    
+    tasks_by_id = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids)).all()}
+    selected = [tasks_by_id[task_id].to_dict() for task_id in task_ids]
+    warning = None
+    if no_fit:
+        warning = f'No tasks fit in {minutes_until_next} minutes until next meeting. Showing shortest task.'
+    return selected, warning
+
+@on_notify
+def publish_next_task(user_id):
+    """Push next_task.changed to live streams when the recommendation moves"""
+    if not broker().has_subscribers(user_id):
+        return
+    selected, warning = recommend_tasks(user_id)
+    task = selected[0] if selected else None
+    task_id = task['id'] if task else None
+    if user_id in _last_next_task and _last_next_task[user_id] == task_id:
+        return
+    _last_next_task[user_id] = task_id
+    publish(user_id, {'type': 'next_task.changed', 'task': task, 'warning': warning})
+
 @bp.route('/next', methods=['GET'])
 @login_required
 def get_next_task():
     user_id = session['user_id']
     
-    priority_order = {'High': 1, 'Medium': 2, 'Low': 3}
+    k = request.args.get('k', type=int)
+    if k is not None and not 1 <= k <= MAX_NEXT_TASKS:
+        return jsonify({'error': f'k must be between 1 and {MAX_NEXT_TASKS}'}), 400
     
-    tasks = Task.query.filter_by(user_id=user_id, completed=False).all()
+    selected, warning = recommend_tasks(user_id, k or 1)
     
-    if not tasks:
+    if not selected:
         return jsonify({'message': 'No incomplete tasks'}), 404
     
-    today = date.today()
-    sync = CalendarSync.query.filter_by(user_id=user_id, sync_date=today).first()
+    if k is not None:
+        response = {'tasks': selected}
+        if warning:
+            response['warning'] = warning
+        return jsonify(response)
     
-    if sync and sync.events_json:
-        import json
-        from datetime import datetime
-        from zoneinfo import ZoneInfo
-        
-        events = json.loads(sync.events_json)
-        local_tz = ZoneInfo('America/Chicago')
-        now = datetime.now(local_tz)
-        
-        next_event = None
-        next_event_time = None
-        
-        for event in events:
-            event_start = datetime.fromisoformat(event['start'])
-            if event_start > now:
-                if next_event_time is None or event_start < next_event_time:
-                    next_event_time = event_start
-                    next_event = event
-        
-        if next_event:
-            minutes_until_next = int((next_event_time - now).total_seconds() / 60)
-            
-            tasks_that_fit = [t for t in tasks if t.duration_minutes <= minutes_until_next]
-            
-            if tasks_that_fit:
-                sorted_tasks = sorted(
-                    tasks_that_fit, 
-                    key=lambda t: (priority_order.get(t.priority, 4), -t.duration_minutes)
-                )
-                return jsonify(sorted_tasks[0].to_dict())
-            else:
-                sorted_tasks = sorted(tasks, key=lambda t: t.duration_minutes)
-                return jsonify({
-                    **sorted_tasks[0].to_dict(),
-                    'warning': f'No tasks fit in {minutes_until_next} minutes until next meeting. Showing shortest task.'
-                })
-        else:
-            tasks_that_fit = [t for t in tasks if t.duration_minutes <= sync.available_minutes]
-            
-            if tasks_that_fit:
-                sorted_tasks = sorted(
-                    tasks_that_fit, 
-                    key=lambda t: (priority_order.get(t.priority, 4), -t.duration_minutes)
-                )
-                return jsonify(sorted_tasks[0].to_dict())
-    
-    sorted_tasks = sorted(tasks, key=lambda t: (priority_order.get(t.priority, 4), t.created_at))
-    
-    return jsonify(sorted_tasks[0].to_dict())
+    if warning:
+        return jsonify({**selected[0], 'warning': warning})
+    return jsonify(selected[0])
@@ -0,0 +1,139 @@
+"""Next-task selection, independent of Flask and the ORM.
+
+Candidate tasks are held as compact parallel arrays (one entry per task)
+so a selection is a single pass plus a bounded heap instead of building
+ORM objects and fully sorting them.
+"""
+from array import array
+import heapq
+
+PRIORITY_RANK = {'High': 1, 'Medium': 2, 'Low': 3}
+UNKNOWN_PRIORITY_RANK = 4
+
+
+class TaskColumns:
+    """Columnar view of candidate tasks: id, duration, priority rank, created_at"""
+
+    __slots__ = ('ids', 'durations', 'ranks', 'created')
+
+    def __init__(self, ids=(), durations=(), ranks=(), created=()):
+        self.ids = array('q', ids)
+        self.durations = array('l', durations)
+        self.ranks = array('b', ranks)
+        self.created = array('d', created)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (id, duration_minutes, priority, created_at) tuples"""
+        columns = cls()
+        for task_id, duration, priority, created_at in rows:
+            columns.ids.append(task_id)
+            columns.durations.append(duration or 0)
+            columns.ranks.append(PRIORITY_RANK.get(priority, UNKNOWN_PRIORITY_RANK))
+            columns.created.append(created_at.timestamp() if created_at else 0.0)
+        return columns
+
+
+def _smallest(k, indices, key):
+    if k == 1:
+        best = min(indices, key=key, default=None)
+        return [] if best is None else [best]
+    return heapq.nsmallest(k, indices, key=key)
+
+
+def select_tasks(columns, k=1, minutes_until_next=None, available_minutes=None):
+    """Pick the best `k` tasks and return (ids, no_fit).
+
+    With `minutes_until_next`, prefer the highest-priority, longest task that
+    fits before the next meeting; if none fit, return the shortest tasks and
+    set `no_fit`. Otherwise prefer tasks fitting in `available_minutes`, and
+    finally fall back to priority then age.
+    """
+    durations = columns.durations
+    ranks = columns.ranks
+    best_fit_key = lambda i: (ranks[i], -durations[i])
+
+    if minutes_until_next is not None:
+        fits = [i for i in range(len(columns)) if durations[i] <= minutes_until_next]
+        if fits:
+            chosen = _smallest(k, fits, best_fit_key)
+            return [columns.ids[i] for i in chosen], False
+        chosen = _smallest(k, range(len(columns)), durations.__getitem__)
+        return [columns.ids[i] for i in chosen], True
+
+    if available_minutes is not None:
+        fits = [i for i in range(len(columns)) if durations[i] <= available_minutes]
+        if fits:
+            chosen = _smallest(k, fits, best_fit_key)
+            return [columns.ids[i] for i in chosen], False
+
+    created = columns.created
+    chosen = _smallest(k, range(len(columns)), lambda i: (ranks[i], created[i]))
+    return [columns.ids[i] for i in chosen], False
+
+
+class _FirstFitTree:
+    """Max segment tree over gap capacities for O(log g) first-fit lookups"""
+
+    def __init__(self, capacities):
+        size = 1
+        while size < len(capacities):
+            size *= 2
+        self.size = size
+        self.tree = [-1] * (2 * size)
+        for i, capacity in enumerate(capacities):
+            self.tree[size + i] = capacity
+        for node in range(size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def find(self, need):
+        """Index of the leftmost gap with at least `need` minutes left, or None"""
+        if self.tree[1] < need:
+            return None
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node] >= need else 2 * node + 1
+        return node - self.size
+
+    def consume(self, index, amount):
+        node = self.size + index
+        self.tree[node] -= amount
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+
+def pack_tasks(columns, gaps):
+    """Place tasks into free gaps by priority, longest first, earliest gap first.
+
+    `gaps` are sorted, non-overlapping (start, end) pairs in minutes, e.g. an
+    IntervalSet of free time. Returns
+    (placements, unscheduled) where placements are (task_id, start, end).
+    """
+    gaps = list(gaps)
+    durations = columns.durations
+    ranks = columns.ranks
+    order = sorted(range(len(columns)), key=lambda i: (ranks[i], -durations[i]))
+
+    tree = _FirstFitTree([end - start for start, end in gaps])
+    cursors = [start for start, _ in gaps]
+    placements = []
+    unscheduled = []
+
+    for i in order:
+        duration = durations[i]
+        gap = tree.find(duration)
+        if gap is None:
+            unscheduled.append(columns.ids[i])
+            continue
+        start = cursors[gap]
+        cursors[gap] = start + duration
+        tree.consume(gap, duration)
+        placements.append((columns.ids[i], start, start + duration))
+
+    placements.sort(key=lambda placement: placement[1])
+    return placements, unscheduled
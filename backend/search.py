@@ -0,0 +1,165 @@
+"""Full-text task search, backed by the database's own text index.
+
+SQLite keeps a separate FTS5 table, tasks_fts, with one row per task. Task
+mapper hooks update it inside the same transaction as the write. Every row
+carries an `owner` token, so a user's query intersects that user's posting
+list instead of filtering matches from everyone. PostgreSQL uses a GIN
+index on a to_tsvector() expression over title and description, which the
+database maintains itself. Any other backend falls back to LIKE.
+
+Bulk writes that bypass the ORM (bulk_insert_mappings, Query.delete) skip
+the hooks and must call `rebuild` or `remove_tasks` themselves.
+"""
+from sqlalchemy import event, inspect, text
+from database import db
+from models import Task
+import re
+
+FTS_TABLE = 'tasks_fts'
+# owner, title, description; title matches count most
+BM25_WEIGHTS = (0.0, 10.0, 1.0)
+PG_DOCUMENT = "to_tsvector('english', coalesce(tasks.title, '') || ' ' || coalesce(tasks.description, ''))"
+PG_INDEX = 'ix_tasks_search'
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 16
+
+_INSERT = text(
+    f'INSERT INTO {FTS_TABLE} (rowid, owner, title, description) '
+    'VALUES (:id, :owner, :title, :description)'
+)
+_DELETE = text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id')
+
+
+def owner_token(user_id):
+    return f'u{user_id}'
+
+
+def create_index(connection):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            "USING fts5(owner, title, description, tokenize='porter unicode61')"
+        ))
+    elif connection.dialect.name == 'postgresql':
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON tasks USING GIN ({PG_DOCUMENT})'))
+
+
+def drop_index(connection):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+
+
+def rebuild(connection, user_ids=None):
+    """Refill tasks_fts from tasks, for everyone or only `user_ids`"""
+    if connection.dialect.name != 'sqlite':
+        return
+    if user_ids is None:
+        connection.execute(text(f'DELETE FROM {FTS_TABLE}'))
+        where, params = '', {}
+    else:
+        owners = ', '.join(f':owner{i}' for i in range(len(user_ids)))
+        users = ', '.join(f':user{i}' for i in range(len(user_ids)))
+        params = {f'owner{i}': owner_token(user_id) for i, user_id in enumerate(user_ids)}
+        params.update({f'user{i}': user_id for i, user_id in enumerate(user_ids)})
+        connection.execute(text(f'DELETE FROM {FTS_TABLE} WHERE owner IN ({owners})'), params)
+        where = f'WHERE user_id IN ({users})'
+    connection.execute(text(
+        f'INSERT INTO {FTS_TABLE} (rowid, owner, title, description) '
+        f"SELECT id, 'u' || user_id, title, coalesce(description, '') FROM tasks {where}"
+    ), params)
+
+
+def remove_tasks(connection, task_ids):
+    if connection.dialect.name == 'sqlite' and task_ids:
+        connection.execute(_DELETE, [{'id': task_id} for task_id in task_ids])
+
+
+def ensure_index(connection):
+    """Create the search index on an existing database; returns True if it was created"""
+    if connection.dialect.name == 'sqlite':
+        if FTS_TABLE in inspect(connection).get_table_names():
+            return False
+        create_index(connection)
+        rebuild(connection)
+        return True
+    if connection.dialect.name == 'postgresql':
+        if PG_INDEX in {index['name'] for index in inspect(connection).get_indexes('tasks')}:
+            return False
+        create_index(connection)
+        return True
+    return False
+
+
+def _index_row(task):
+    return {
+        'id': task.id,
+        'owner': owner_token(task.user_id),
+        'title': task.title,
+        'description': task.description or ''
+    }
+
+
+def _after_insert(mapper, connection, task):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(_INSERT, _index_row(task))
+
+
+def _after_update(mapper, connection, task):
+    if connection.dialect.name != 'sqlite':
+        return
+    state = inspect(task)
+    if not any(state.attrs[key].history.has_changes() for key in ('title', 'description', 'user_id')):
+        return
+    connection.execute(_DELETE, {'id': task.id})
+    connection.execute(_INSERT, _index_row(task))
+
+
+def _after_delete(mapper, connection, task):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(_DELETE, {'id': task.id})
+
+
+event.listen(Task.__table__, 'after_create', lambda table, connection, **kw: create_index(connection))
+event.listen(Task.__table__, 'before_drop', lambda table, connection, **kw: drop_index(connection))
+event.listen(Task, 'after_insert', _after_insert)
+event.listen(Task, 'after_update', _after_update)
+event.listen(Task, 'after_delete', _after_delete)
+
+
+def query_terms(q):
+    """Words in the user's query, dropping FTS syntax characters"""
+    return re.findall(r'\w+', q.lower())[:MAX_TERMS]
+
+
+def fts_query(user_id, terms):
+    """FTS5 MATCH expression: this user's tasks containing every term, the last as a prefix"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return f'owner:"{owner_token(user_id)}" AND {{title description}}: ({" AND ".join(quoted)})'
+
+
+def search_tasks(query, user_id, q):
+    """Restrict and order a Task query by relevance to `q`; None if `q` has no words"""
+    terms = query_terms(q)
+    if not terms:
+        return None
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        fts = db.table(FTS_TABLE, db.column('rowid'))
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        return query.join(fts, fts.c.rowid == Task.id).filter(
+            text(f'{FTS_TABLE} MATCH :match').bindparams(match=fts_query(user_id, terms))
+        ).order_by(text(f'bm25({FTS_TABLE}, {weights})'), Task.id.desc())
+
+    if dialect == 'postgresql':
+        document = db.literal_column(PG_DOCUMENT)
+        tsquery = db.func.plainto_tsquery('english', ' '.join(terms))
+        return query.filter(document.op('@@')(tsquery)).order_by(
+            db.func.ts_rank(document, tsquery).desc(), Task.id.desc()
+        )
+
+    for term in terms:
+        pattern = f'%{term}%'
+        query = query.filter(db.or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+    return query.order_by(Task.created_at.desc(), Task.id.desc())
@@ -0,0 +1,105 @@
+"""Fast JSON encoding for API responses.
+
+FastJSONProvider replaces Flask's JSON provider so every `jsonify` call uses
+orjson when it is installed (stdlib json otherwise) and encodes datetimes as
+ISO 8601. Task listings can skip ORM objects entirely by selecting
+TASK_COLUMNS and turning the rows into dicts, and very long listings can be
+streamed as a chunked JSON array.
+"""
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from models import Task
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+TASK_COLUMNS = (
+    Task.id,
+    Task.user_id,
+    Task.title,
+    Task.description,
+    Task.duration_minutes,
+    Task.priority,
+    Task.completed,
+    Task.completed_at,
+    Task.created_at,
+)
+TASK_FIELDS = tuple(column.key for column in TASK_COLUMNS)
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(value):
+    """Compact UTF-8 JSON as bytes, keys in insertion order"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's provider with orjson underneath; keys stay sorted either way"""
+
+    default = staticmethod(_default)
+    # orjson always writes UTF-8, so the stdlib path must too for the output
+    # not to depend on whether orjson is installed
+    ensure_ascii = False
+
+    def _orjson_option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            if orjson is not None:
+                return orjson.dumps(obj, default=_default, option=self._orjson_option()).decode()
+            kwargs['separators'] = (',', ':')
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self._orjson_option()) + b'\n',
+            mimetype=self.mimetype
+        )
+
+
+def task_rows(query):
+    """Restrict a Task query to plain column tuples, no ORM objects"""
+    return query.with_entities(*TASK_COLUMNS)
+
+
+def row_dicts(rows, fields=TASK_FIELDS):
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def stream_json_array(rows, fields=TASK_FIELDS, chunk_size=500):
+    """Chunked response body for a JSON array of row dicts"""
+    def generate():
+        yield b'['
+        first = True
+        chunk = []
+        for row in rows:
+            chunk.append(dict(zip(fields, row)))
+            if len(chunk) >= chunk_size:
+                body = dumps(chunk)[1:-1]
+                yield body if first else b',' + body
+                first = False
+                chunk = []
+        if chunk:
+            body = dumps(chunk)[1:-1]
+            yield body if first else b',' + body
+        yield b']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,216 @@
+"""Rate limiting and request coalescing for POST /api/calendar/sync.
+
+Each user gets a token bucket of SYNC_RATE_LIMIT_BURST syncs refilled at
+SYNC_RATE_LIMIT_PER_MINUTE. Concurrent syncs for the same user and range
+are single-flighted: one request makes the upstream Google call and the
+others share its result. State lives in this process by default; setting
+SYNC_GUARD_URL to a redis:// URL shares both across workers, like
+EVENT_BROKER_URL does for pubsub.
+
+Only the request that makes the upstream call takes a token; requests
+coalesced onto it share its outcome, 429 included.
+"""
+from flask import current_app
+import threading
+import time
+import uuid
+
+
+class RateLimited(Exception):
+    """The user's token bucket is empty; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many calendar syncs, try again later')
+        self.retry_after = retry_after
+
+
+class FlightFailed(Exception):
+    """The request another worker was running for this key failed or never finished"""
+
+
+class LocalRateLimiter:
+    def __init__(self, burst, per_minute):
+        self.capacity = float(burst)
+        self.rate = per_minute / 60.0
+        self.lock = threading.Lock()
+        self.buckets = {}  # key -> [tokens, last refill (monotonic)]
+
+    def allow(self, key):
+        """(allowed, seconds until the next token) and take a token if allowed"""
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = [tokens, now]
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LocalSingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def run(self, key, fn, follower):
+        """Return (result, shared). Only one caller per key runs `fn`; the rest get its result.
+
+        `follower` is unused here and exists for the shared backend, where
+        waiting requests cannot receive the leader's return value.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+
+# Refill and take a token atomically; returns {allowed, tokens left}
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+local last = tonumber(redis.call('HGET', KEYS[1], 'last'))
+if tokens == nil then
+    tokens = capacity
+    last = now
+end
+tokens = math.min(capacity, tokens + (now - last) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'last', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+# Delete the lock only if this request still owns it
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisRateLimiter:
+    def __init__(self, client, burst, per_minute):
+        self.capacity = float(burst)
+        self.rate = per_minute / 60.0
+        self.script = client.register_script(_TOKEN_BUCKET)
+
+    def allow(self, key):
+        allowed, tokens = self.script(keys=[f'flowfocus:sync-rate:{key}'],
+                                      args=[self.capacity, self.rate, time.time()])
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / self.rate
+
+
+class RedisSingleFlight:
+    def __init__(self, client, lock_seconds=30, poll_seconds=0.05):
+        self.client = client
+        self.lock_seconds = lock_seconds
+        self.poll_seconds = poll_seconds
+        self.release = client.register_script(_RELEASE)
+
+    def run(self, key, fn, follower):
+        """Return (result, shared). The lock holder runs `fn`; waiters call `follower` once it succeeds.
+
+        The leader leaves its outcome under `{lock}:{token}`. Waiters re-raise
+        RateLimited from it and raise FlightFailed when the leader failed or
+        its lock expired first, rather than reading rows it never wrote.
+        """
+        name = f'flowfocus:sync-flight:{key}'
+        token = uuid.uuid4().hex
+        while True:
+            if self.client.set(name, token, nx=True, px=int(self.lock_seconds * 1000)):
+                return self._lead(name, token, fn), False
+            leader = self._get(name)
+            if leader is not None:
+                break
+            # Released between SET and GET; try to take it again
+
+        deadline = time.monotonic() + self.lock_seconds
+        while self._get(name) == leader:
+            if time.monotonic() >= deadline:
+                raise FlightFailed('Calendar sync in another worker did not finish in time')
+            time.sleep(self.poll_seconds)
+
+        outcome = self._get(f'{name}:{leader}')
+        if outcome == 'ok':
+            return follower(), True
+        if outcome and outcome.startswith('rate-limited:'):
+            raise RateLimited(float(outcome.split(':', 1)[1]))
+        raise FlightFailed(outcome.split(':', 1)[1] if outcome else 'Calendar sync in another worker did not finish')
+
+    def _get(self, name):
+        value = self.client.get(name)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _lead(self, name, token, fn):
+        outcome = 'failed:Calendar sync in another worker failed'
+        try:
+            result = fn()
+            outcome = 'ok'
+            return result
+        except RateLimited as e:
+            outcome = f'rate-limited:{e.retry_after}'
+            raise
+        except Exception as e:
+            outcome = f'failed:{e}'
+            raise
+        finally:
+            # Written before the lock goes, so waiters always find it
+            self.client.set(f'{name}:{token}', outcome, px=int(self.lock_seconds * 1000))
+            self.release(keys=[name], args=[token])
+
+
+class SyncGuard:
+    def __init__(self, limiter, flight):
+        self.limiter = limiter
+        self.flight = flight
+
+
+def init_app(app):
+    burst = app.config.get('SYNC_RATE_LIMIT_BURST', 5)
+    per_minute = app.config.get('SYNC_RATE_LIMIT_PER_MINUTE', 6)
+    url = app.config.get('SYNC_GUARD_URL')
+    if url:
+        import redis
+        client = redis.Redis.from_url(url)
+        guard = SyncGuard(RedisRateLimiter(client, burst, per_minute), RedisSingleFlight(client))
+    else:
+        guard = SyncGuard(LocalRateLimiter(burst, per_minute), LocalSingleFlight())
+    app.extensions['sync_guard'] = guard
+
+
+def sync_guard():
+    return current_app.extensions['sync_guard']
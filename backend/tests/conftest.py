@@ -0,0 +1,53 @@
+import pytest
+from app import create_app
+from database import db
+from models import User
+from tests.google_stub import GoogleStub
+import google_clients
+import user_cache
+from routes import plan
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Process-wide caches are keyed on user ids, which every test reuses
+    user_cache._user_cache.clear()
+    plan._plan_cache.clear()
+    google_clients._clients.clear()
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+    })
+    with app.app_context():
+        db.create_all()
+    # No context stays pushed, so each request gets its own session and `g`
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user(app):
+    """Id of a user signed in with Google"""
+    with app.app_context():
+        user = User(google_id='google-1', email='user@example.com', name='Test User', access_token='token')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user
+    return client
+
+
+@pytest.fixture
+def google(app):
+    """A stub Google Calendar API the app's client library talks to over HTTP"""
+    with GoogleStub() as stub:
+        app.config['GOOGLE_API_ENDPOINT'] = stub.url
+        yield stub
@@ -0,0 +1,59 @@
+"""A local HTTP server standing in for the Google Calendar API.
+
+The app talks to it through the real googleapiclient once
+GOOGLE_API_ENDPOINT points at `url`, so requests, paging, sync tokens and
+410s go over the wire exactly as they would against Google. Calendar state
+and events().list semantics come from benchmarks.fake_google.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+from googleapiclient.errors import HttpError
+from benchmarks.fake_google import FakeCalendarService
+import json
+import threading
+
+
+class GoogleStub:
+    def __init__(self):
+        self.calendar = FakeCalendarService(latency=0)
+        self.requests = []  # query parameters of every events.list call
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != '/calendars/primary/events':
+                    return self.reply(404, {'error': {'code': 404, 'message': 'Not Found'}})
+                params = dict(parse_qsl(url.query))
+                stub.requests.append(params)
+                try:
+                    return self.reply(200, stub.calendar.handle(params))
+                except HttpError as e:
+                    return self.reply(e.resp.status, {'error': {'code': e.resp.status, 'message': str(e)}})
+
+            def reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def calls(self):
+        return len(self.requests)
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from archive import archive_syncs, archive_tasks
+from database import db
+from models import ArchivedTask, CalendarSync, Task
+from timezones import local_today
+
+
+def add_tasks(app, user, count, completed_days_ago=None, age_minutes=0):
+    """`count` tasks created a minute apart, oldest first and the newest `age_minutes` ago; returns their ids"""
+    now = datetime.utcnow()
+    with app.app_context():
+        tasks = [Task(user_id=user, title=f'task {i}', duration_minutes=15, created_at=now - timedelta(minutes=age_minutes + count - i),
+                      completed=completed_days_ago is not None,
+                      completed_at=now - timedelta(days=completed_days_ago) if completed_days_ago is not None else None)
+                 for i in range(count)]
+        db.session.add_all(tasks)
+        db.session.commit()
+        return [task.id for task in tasks]
+
+
+def test_archived_tasks_move_and_stay_readable(app, client, user):
+    [old] = add_tasks(app, user, 1, completed_days_ago=120)
+    [recent] = add_tasks(app, user, 1, completed_days_ago=1)
+
+    with app.app_context():
+        assert archive_tasks(90) == 1
+        assert db.session.get(Task, old) is None
+        assert ArchivedTask.query.filter_by(task_id=old).count() == 1
+
+    assert client.get(f'/api/tasks/{old}').status_code == 404
+    archived = client.get(f'/api/tasks/{old}?include_archived=true').json
+    assert (archived['id'], archived['archived']) == (old, True)
+    assert [task['id'] for task in client.get('/api/tasks').json['tasks']] == [recent]
+
+
+def test_archived_task_ids_are_not_reused(app, client, user):
+    [task_id] = add_tasks(app, user, 1, completed_days_ago=120)
+    with app.app_context():
+        archive_tasks(90)
+
+    created = client.post('/api/tasks', json={'title': 'next', 'duration_minutes': 10}).json
+
+    assert created['id'] > task_id
+    assert client.get(f'/api/tasks/{task_id}?include_archived=true').json['title'] == 'task 0'
+
+
+def test_union_pagination_returns_every_task_once_in_order(app, client, user):
+    archived = add_tasks(app, user, 5, completed_days_ago=120, age_minutes=60)
+    hot = add_tasks(app, user, 4)
+    with app.app_context():
+        archive_tasks(90)
+
+    seen, cursor = [], None
+    while True:
+        page = client.get('/api/tasks', query_string={
+            'include_archived': 'true', 'limit': 3, **({'cursor': cursor} if cursor else {})
+        }).json
+        seen.extend((task['id'], task['archived']) for task in page['tasks'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert seen == [(task_id, False) for task_id in reversed(hot)] + [(task_id, True) for task_id in reversed(archived)]
+
+
+def test_archived_syncs_are_returned_by_range(app, client, user):
+    day = local_today(None) - timedelta(days=40)
+    with app.app_context():
+        db.session.add(CalendarSync(user_id=user, sync_date=day, total_minutes=480, available_minutes=420,
+                                    events_json='[]', busy_json='[[600, 660]]', free_json='[[540, 600], [660, 1020]]'))
+        db.session.commit()
+        assert archive_syncs(30) == 1
+        assert CalendarSync.query.count() == 0
+
+    hot = client.get(f'/api/calendar/range?start={day.isoformat()}').json
+    archived = client.get(f'/api/calendar/range?start={day.isoformat()}&include_archived=true').json
+
+    assert hot['syncs'] == []
+    [sync] = archived['syncs']
+    assert (sync['available_minutes'], sync['busy_intervals'], sync['archived']) == (420, [[600, 660]], True)
+    assert sync['events'] == []
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from database import db
+from models import CalendarEvent, User
+from timezones import DEFAULT_TIMEZONE, local_today, zone
+
+
+def local(day, hour, minute=0):
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone(DEFAULT_TIMEZONE))
+
+
+def test_full_sync_reads_events_over_http(client, google):
+    today = local_today(None)
+    google.calendar.add_event('standup', local(today, 10), local(today, 10, 30))
+    google.calendar.add_event('review', local(today, 13), local(today, 14))
+
+    response = client.post('/api/calendar/sync')
+
+    assert response.status_code == 200
+    assert response.json['sync_date'] == today.isoformat()
+    assert response.json['total_minutes'] == 480
+    assert response.json['available_minutes'] == 480 - 90
+    assert response.json['busy_intervals'] == [[600, 630], [780, 840]]
+    [request] = google.requests
+    assert request['singleEvents'] == 'true'
+    assert 'timeMin' in request and 'timeMax' in request
+    assert 'syncToken' not in request
+
+
+def test_full_sync_is_bounded_by_the_horizon(app, client, google, user):
+    today = local_today(None)
+    google.calendar.add_event('soon', local(today, 10), local(today, 11))
+    google.calendar.add_event('far', local(today + timedelta(days=200), 10), local(today + timedelta(days=200), 11))
+
+    client.post('/api/calendar/sync')
+
+    [request] = google.requests
+    assert datetime.fromisoformat(request['timeMax']) < local(today + timedelta(days=100), 0)
+    with app.app_context():
+        assert [event.external_id for event in CalendarEvent.query.filter_by(user_id=user)] == ['soon']
+
+
+def test_incremental_sync_sends_the_sync_token(app, client, google, user):
+    today = local_today(None)
+    google.calendar.add_event('standup', local(today, 10), local(today, 10, 30))
+    client.post('/api/calendar/sync')
+
+    google.calendar.cancel_event('standup')
+    google.calendar.add_event('lunch', local(today, 12), local(today, 13))
+    google.calendar.add_event('far', local(today + timedelta(days=200), 10), local(today + timedelta(days=200), 11))
+    response = client.post('/api/calendar/sync?force=true')
+
+    assert response.json['available_minutes'] == 480 - 60
+    assert google.requests[1]['syncToken'].isdigit()
+    assert 'timeMin' not in google.requests[1]
+    with app.app_context():
+        assert {event.external_id for event in CalendarEvent.query.filter_by(user_id=user)} == {'lunch'}
+
+
+def test_expired_sync_token_falls_back_to_a_full_sync(app, client, google, user):
+    today = local_today(None)
+    google.calendar.add_event('standup', local(today, 10), local(today, 11))
+    with app.app_context():
+        stored = db.session.get(User, user)
+        stored.calendar_sync_token = 'expired'
+        stored.calendar_synced_until = datetime.utcnow() + timedelta(days=90)
+        db.session.commit()
+
+    response = client.post('/api/calendar/sync')
+
+    assert response.status_code == 200
+    assert response.json['available_minutes'] == 480 - 60
+    assert google.requests[0]['syncToken'] == 'expired'
+    assert 'timeMin' in google.requests[1]
+
+
+def test_events_longer_than_two_weeks_stay_busy(client, google):
+    today = local_today(None)
+    google.calendar.add_event('leave', local(today - timedelta(days=20), 0), local(today + timedelta(days=2), 0))
+
+    response = client.post('/api/calendar/sync')
+
+    assert response.json['available_minutes'] == 0
+    assert response.json['busy_intervals'] == [[540, 1020]]
+
+
+def test_google_errors_are_reported(client, google):
+    google.calendar.error_rate = 1.0
+
+    response = client.post('/api/calendar/sync')
+
+    assert response.status_code == 500
+
+
+def test_sync_outside_the_pull_window_is_rejected(client, google):
+    today = local_today(None)
+
+    before = client.post(f'/api/calendar/sync?start={(today - timedelta(days=30)).isoformat()}')
+    past_horizon = client.post(f'/api/calendar/sync?start={(today + timedelta(days=85)).isoformat()}&days=10')
+
+    assert before.status_code == 400
+    assert past_horizon.status_code == 400
+    assert google.requests == []
+
+
+def test_range_sync_buckets_events_by_day(client, google):
+    today = local_today(None)
+    start = today - timedelta(days=2)
+    google.calendar.add_event('standup', local(start, 10), local(start, 10, 30))
+    google.calendar.add_event('overnight', local(start + timedelta(days=1), 16), local(start + timedelta(days=2), 10))
+    google.calendar.add_event('review', local(today + timedelta(days=1), 13), local(today + timedelta(days=1), 14))
+
+    response = client.post(f'/api/calendar/sync?start={start.isoformat()}&days=5')
+
+    assert response.status_code == 200
+    assert [sync['busy_intervals'] for sync in response.json['syncs']] == [
+        [[600, 630]], [[960, 1020]], [[540, 600]], [[780, 840]], [],
+    ]
+
+
+def test_range_lists_only_syncable_days_as_missing(client):
+    today = local_today(None)
+
+    response = client.get(f'/api/calendar/range?start={(today - timedelta(days=8)).isoformat()}&days=3')
+
+    assert response.json['missing_dates'] == [(today - timedelta(days=6)).isoformat()]
+
+
+def later(days):
+    """A datetime class whose clock runs `days` days ahead"""
+    class Later(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(days=days)
+
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() + timedelta(days=days)
+    return Later
+
+
+def test_events_past_the_first_horizon_arrive_once_time_moves_on(client, google, monkeypatch):
+    today = local_today(None)
+    far = today + timedelta(days=95)
+    google.calendar.add_event('planning', local(far, 10), local(far, 11))
+    client.post('/api/calendar/sync')
+    assert google.requests[0]['timeMax'] < local(far, 0).isoformat()
+
+    # Two weeks on, `far` is inside the sync window although the meeting never changed
+    import timezones
+    import routes.calendar_sync
+    monkeypatch.setattr(routes.calendar_sync, 'datetime', later(14))
+    monkeypatch.setattr(timezones, 'datetime', later(14))
+    response = client.post(f'/api/calendar/sync?start={far.isoformat()}')
+
+    assert response.status_code == 200
+    assert response.json['syncs'][0]['busy_intervals'] == [[600, 660]]
+    assert 'timeMin' in google.requests[1]
+
+
+def test_incremental_syncs_continue_while_the_horizon_holds(client, google, monkeypatch):
+    client.post('/api/calendar/sync')
+
+    import timezones
+    import routes.calendar_sync
+    monkeypatch.setattr(routes.calendar_sync, 'datetime', later(3))
+    monkeypatch.setattr(timezones, 'datetime', later(3))
+    client.post('/api/calendar/sync?force=true')
+
+    assert 'syncToken' in google.requests[1]
+
+
+def test_days_changed_by_an_earlier_sync_of_another_range_are_rebuilt(client, google):
+    today = local_today(None)
+    tomorrow = today + timedelta(days=1)
+    client.post(f'/api/calendar/sync?start={today.isoformat()}&days=2')
+
+    google.calendar.add_event('review', local(tomorrow, 10), local(tomorrow, 11))
+    client.post('/api/calendar/sync?force=true')
+    response = client.post(f'/api/calendar/sync?start={tomorrow.isoformat()}&force=true')
+
+    assert response.json['syncs'][0]['busy_intervals'] == [[600, 660]]
@@ -0,0 +1,21 @@
+import importlib
+import sys
+
+
+def test_importing_app_builds_no_app(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'wsgi', raising=False)
+    import app
+
+    importlib.reload(app)
+
+    assert 'wsgi' not in sys.modules
+
+
+def test_the_old_app_app_target_still_resolves(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "entry.db"}')
+    monkeypatch.delitem(sys.modules, 'wsgi', raising=False)
+    import app
+
+    from flask import Flask
+    assert isinstance(app.app, Flask)
+    assert app.app is sys.modules['wsgi'].app
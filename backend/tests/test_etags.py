@@ -0,0 +1,30 @@
+from database import db
+from etags import bump_data_version
+from models import User
+
+
+def write_from_another_worker(app, user, **values):
+    """Change the user row without touching this worker's user cache"""
+    with app.app_context():
+        User.query.filter_by(id=user).update(values)
+        bump_data_version(user)
+        db.session.commit()
+
+
+def test_etag_and_body_come_from_the_same_version(app, client, user):
+    first = client.get('/api/settings/work-hours')
+    write_from_another_worker(app, user, work_end_hour=18)
+
+    second = client.get('/api/settings/work-hours', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 200
+    assert second.json['work_end_hour'] == 18
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_unchanged_data_is_answered_with_304(client):
+    first = client.get('/api/settings/work-hours')
+
+    second = client.get('/api/settings/work-hours', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 304
@@ -0,0 +1,38 @@
+from instrumentation import SlowRequestProfiler
+
+
+def test_metrics_are_hidden_without_a_token(app):
+    assert app.test_client().get('/metrics').status_code == 404
+    assert app.test_client().get('/metrics/slow').status_code == 404
+
+
+def test_metrics_are_open_in_debug_mode(app):
+    app.debug = True
+
+    assert app.test_client().get('/metrics').status_code == 200
+
+
+def test_metrics_require_the_configured_token(app):
+    app.config['METRICS_TOKEN'] = 'secret'
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert b'flowfocus_' in response.data
+
+
+def test_profiler_samples_from_the_first_request(monkeypatch):
+    profiler = SlowRequestProfiler(threshold=0)
+    assert profiler.sampler_pid is None
+
+    profiler.start()
+    started = profiler.sampler_pid
+    profiler.finish(0.1, 'tasks.get_tasks', '/api/tasks')
+
+    assert started is not None
+    # A forked worker has a new pid and starts its own sampler
+    monkeypatch.setattr('os.getpid', lambda: started + 1)
+    profiler.start()
+    assert profiler.sampler_pid == started + 1
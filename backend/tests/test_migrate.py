@@ -0,0 +1,68 @@
+from sqlalchemy import inspect, text
+from database import db
+from migrate import migrate
+from models import Task
+
+
+def columns(table):
+    return {column['name'] for column in inspect(db.engine).get_columns(table)}
+
+
+def indexes(table):
+    return {index['name'] for index in inspect(db.engine).get_indexes(table)}
+
+
+def test_migrate_adds_columns_and_indexes_to_existing_tables(app, user):
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE calendar_syncs DROP COLUMN busy_json'))
+        connection.execute(text('ALTER TABLE calendar_syncs DROP COLUMN free_json'))
+        connection.execute(text('ALTER TABLE users DROP COLUMN calendar_sync_token'))
+        connection.execute(text('DROP INDEX ix_calendar_events_user_end'))
+        connection.execute(text('ALTER TABLE users DROP COLUMN data_version'))
+        connection.execute(text('ALTER TABLE users DROP COLUMN calendar_synced_until'))
+
+    changes = migrate(app)
+
+    assert changes[:5] == [
+        'add column calendar_syncs.busy_json',
+        'add column calendar_syncs.free_json',
+        'add column users.calendar_sync_token',
+        'create index ix_calendar_events_user_end',
+        'add column users.data_version',
+    ]
+    assert 'add column users.calendar_synced_until' in changes
+    with app.app_context():
+        assert {'busy_json', 'free_json'} <= columns('calendar_syncs')
+        assert {'calendar_sync_token', 'data_version'} <= columns('users')
+        assert 'ix_calendar_events_user_end' in indexes('calendar_events')
+        assert db.session.execute(text('SELECT data_version FROM users')).scalar() == 0
+
+
+def test_migrate_is_idempotent(app):
+    assert migrate(app) == []
+    assert migrate(app) == []
+
+
+def test_migrate_rebuilds_tasks_with_autoincrement(app, user):
+    with app.app_context(), db.engine.begin() as connection:
+        sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'tasks'")).scalar()
+        connection.execute(text('DROP TABLE tasks'))
+        connection.execute(text(sql.replace('AUTOINCREMENT', '')))
+        connection.execute(text(
+            "INSERT INTO tasks (id, user_id, title, completed, created_at) VALUES (5, :user, 'kept', 0, '2026-01-01')"
+        ), {'user': user})
+        connection.execute(text(
+            "INSERT INTO archived_tasks (task_id, user_id, title, completed, created_at) "
+            "VALUES (9, :user, 'archived', 1, '2026-01-01')"
+        ), {'user': user})
+
+    changes = migrate(app)
+
+    assert 'rebuild table tasks with AUTOINCREMENT' in changes
+    with app.app_context():
+        assert 'ix_tasks_user_completed_created' in indexes('tasks')
+        assert db.session.execute(text('SELECT title FROM tasks WHERE id = 5')).scalar() == 'kept'
+        task = Task(user_id=user, title='new')
+        db.session.add(task)
+        db.session.commit()
+        assert task.id == 10
@@ -0,0 +1,72 @@
+"""Query budgets for the main endpoints, counted with instrumentation.count_queries.
+
+Counts are taken with the user row already cached, as for every request
+after a user's first one. They must not grow with the number of tasks.
+"""
+import pytest
+from database import db
+from etags import bump_data_version
+from instrumentation import count_queries
+from models import CalendarSync, Task
+from timezones import local_today
+from user_cache import invalidate_cached_user
+
+# (method, path, json body) -> most statements the request may run
+BUDGETS = [
+    ('get', '/auth/me', None, 0),
+    ('get', '/api/tasks', None, 2),
+    ('get', '/api/tasks?completed=false&priority=High', None, 2),
+    ('get', '/api/tasks/1', None, 1),
+    ('get', '/api/tasks/next', None, 3),
+    ('get', '/api/tasks/search?q=task', None, 2),
+    ('get', '/api/calendar/today', None, 2),
+    ('get', '/api/plan/today', None, 3),
+    ('get', '/api/settings/work-hours', None, 1),
+    ('get', '/api/analytics/daily', None, 2),
+    ('post', '/api/tasks', {'title': 'new', 'duration_minutes': 15}, 6),
+    ('put', '/api/tasks/1', {'completed': True}, 8),
+    ('post', '/api/tasks/batch', {'operations': [
+        {'op': 'update', 'id': task_id, 'data': {'priority': 'Low'}} for task_id in range(1, 21)]}, 8),
+]
+
+
+def seed(app, user, tasks, sync=True):
+    with app.app_context():
+        db.session.add_all(Task(user_id=user, title=f'task {i}', duration_minutes=30, priority='High')
+                           for i in range(tasks))
+        if sync:
+            db.session.add(CalendarSync(
+                user_id=user, sync_date=local_today(None), total_minutes=480, available_minutes=400,
+                events_json='[]', busy_json='[[600, 680]]', free_json='[[540, 600], [680, 1020]]'
+            ))
+        # As the write endpoints do, so cached users, plans and ETags see the new rows
+        bump_data_version(user)
+        db.session.commit()
+    invalidate_cached_user(user)
+
+
+def measure(client, method, path, body):
+    # Warm the user cache the way any earlier request would
+    client.get('/auth/me')
+    with count_queries() as queries:
+        response = getattr(client, method)(path, json=body)
+    assert response.status_code < 300, response.get_data(as_text=True)
+    assert response.headers['X-Query-Count'] == str(queries.count)
+    return queries.count
+
+
+@pytest.mark.parametrize('method,path,body,budget', BUDGETS, ids=[f'{m} {p}' for m, p, _, _ in BUDGETS])
+def test_query_budget(app, client, user, method, path, body, budget):
+    seed(app, user, 30)
+
+    assert measure(client, method, path, body) <= budget
+
+
+@pytest.mark.parametrize('method,path,body', [budget[:3] for budget in BUDGETS if budget[0] == 'get'],
+                         ids=[p for m, p, _, _ in BUDGETS if m == 'get'])
+def test_query_count_does_not_grow_with_tasks(app, client, user, method, path, body):
+    seed(app, user, 25)
+    few = measure(client, method, path, body)
+    seed(app, user, 200, sync=False)
+
+    assert measure(client, method, path, body) == few
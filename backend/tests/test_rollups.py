@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from database import db
+from models import DailyStat, Task
+from rollups import backfill, backfill_pending
+from models import User
+from timezones import local_today
+
+
+def stat(app, user, day=None):
+    with app.app_context():
+        return DailyStat.query.filter_by(user_id=user, stat_date=day or local_today(None)).first()
+
+
+def test_completions_are_counted_per_local_day(app, client, user):
+    task_id = client.post('/api/tasks', json={'title': 'write', 'duration_minutes': 25}).json['id']
+
+    client.put(f'/api/tasks/{task_id}', json={'completed': True})
+
+    today = stat(app, user)
+    assert (today.completed_tasks, today.completed_minutes) == (1, 25)
+
+
+def test_uncompleting_a_task_from_before_rollups_does_not_go_negative(app, client, user):
+    with app.app_context():
+        task = Task(user_id=user, title='old', duration_minutes=30, completed=True, completed_at=datetime.utcnow())
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+
+    response = client.put(f'/api/tasks/{task_id}', json={'completed': False})
+
+    assert response.status_code == 200
+    today = stat(app, user)
+    assert (today.completed_tasks, today.completed_minutes) == (0, 0)
+
+
+def test_planned_minutes_are_captured_when_availability_is_unchanged(app, client, user, google):
+    client.post('/api/calendar/sync')
+    client.post('/api/tasks', json={'title': 'write', 'duration_minutes': 40})
+
+    response = client.post('/api/calendar/sync?force=true')
+
+    assert response.status_code == 200
+    assert stat(app, user).planned_minutes == 40
+
+
+def test_timezone_change_queues_a_rebuild_for_the_worker(app, client, user):
+    with app.app_context():
+        # 03:00 UTC is the previous evening in Chicago and the same day in Berlin
+        completed_at = datetime.combine(local_today('Europe/Berlin'), datetime.min.time()) + timedelta(hours=3)
+        db.session.add(Task(user_id=user, title='late', duration_minutes=20, completed=True, completed_at=completed_at))
+        db.session.commit()
+        backfill([user])
+    chicago_day = completed_at.date() - timedelta(days=1)
+
+    response = client.put('/api/settings/work-hours',
+                          json={'work_start_hour': 9, 'work_end_hour': 17, 'timezone': 'Europe/Berlin'})
+
+    assert response.status_code == 200
+    assert stat(app, user, chicago_day).completed_tasks == 1
+    with app.app_context():
+        assert db.session.get(User, user).rollups_stale_since is not None
+        assert backfill_pending() == 1
+        assert db.session.get(User, user).rollups_stale_since is None
+        assert backfill_pending() == 0
+    assert stat(app, user, chicago_day) is None
+    assert stat(app, user, completed_at.date()).completed_tasks == 1
+
+
+def test_rebuild_locks_the_users_before_reading(app, user):
+    with app.app_context():
+        version = db.session.get(User, user).data_version
+        backfill([user])
+        db.session.expire_all()
+        assert db.session.get(User, user).data_version == version + 1
+
+
+def test_backfill_counts_archived_history_and_keeps_planned_minutes(app, user):
+    from archive import archive_syncs, archive_tasks
+    from models import CalendarSync
+    day = local_today(None) - timedelta(days=100)
+    with app.app_context():
+        completed_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=18)
+        db.session.add_all([
+            Task(user_id=user, title='old', duration_minutes=30, completed=True, completed_at=completed_at),
+            Task(user_id=user, title='older', duration_minutes=15, completed=True, completed_at=completed_at),
+            CalendarSync(user_id=user, sync_date=day, total_minutes=480, available_minutes=300),
+            DailyStat(user_id=user, stat_date=day, completed_tasks=99, completed_minutes=0, planned_minutes=90),
+        ])
+        db.session.commit()
+        archive_tasks(90)
+        archive_syncs(30)
+
+        assert backfill([user]) == 1
+
+    rebuilt = stat(app, user, day)
+    assert (rebuilt.completed_tasks, rebuilt.completed_minutes) == (2, 45)
+    assert (rebuilt.planned_minutes, rebuilt.total_minutes, rebuilt.available_minutes) == (90, 480, 300)
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from flask import jsonify
+import pytest
+import serialization
+
+VALUE = {'title': 'Café ☕', 'id': 7, 'created_at': datetime(2026, 1, 2, 3, 4, 5), 'day': date(2026, 1, 2),
+         'nested': {'z': 1, 'a': [1, 2]}}
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(serialization, 'orjson', None)
+    elif serialization.orjson is None:
+        pytest.skip('orjson is not installed')
+    return request.param
+
+
+def test_responses_match_with_and_without_orjson(app, encoder):
+    with app.test_request_context():
+        body = jsonify(VALUE).get_data(as_text=True)
+        text = app.json.dumps(VALUE)
+
+    expected = ('{"created_at":"2026-01-02T03:04:05","day":"2026-01-02","id":7,'
+                '"nested":{"a":[1,2],"z":1},"title":"Café ☕"}')
+    assert body == expected + '\n'
+    assert text == expected
+
+
+def test_compact_dumps_match_with_and_without_orjson(encoder):
+    assert serialization.dumps([{'title': 'Café', 'id': 1}]) == '[{"title":"Café","id":1}]'.encode()
+
+
+def test_sync_rows_return_events_as_nested_json(app, client):
+    from database import db
+    from models import CalendarSync
+    from timezones import local_today
+
+    with app.app_context():
+        db.session.add(CalendarSync(user_id=1, sync_date=local_today(None), total_minutes=480,
+                                    available_minutes=450, events_json='[{"summary": "Standup"}]'))
+        db.session.commit()
+
+    response = client.get('/api/calendar/today')
+
+    assert response.json['events'] == [{'summary': 'Standup'}]
+    assert response.json['events_json'] == '[{"summary": "Standup"}]'
@@ -0,0 +1,51 @@
+from database import db
+from etags import bump_data_version
+from pubsub import notify
+
+
+def events(response, count):
+    """The first `count` non-comment chunks of an event stream"""
+    chunks = []
+    for chunk in response.response:
+        if not chunk.startswith(b':') and not chunk.startswith(b'retry'):
+            chunks.append(chunk.decode())
+            if len(chunks) == count:
+                break
+    return chunks
+
+
+def test_stream_is_off_by_default(client):
+    assert client.get('/api/stream').status_code == 404
+
+
+def test_api_workers_do_not_serve_the_stream(app, client):
+    app.config.update(LIVE_UPDATES=True)
+
+    assert client.get('/api/stream').status_code == 404
+
+
+def test_stream_delivers_notify_events(app, client, user):
+    app.config.update(LIVE_UPDATES=True, SERVE_STREAM=True, STREAM_HEARTBEAT_SECONDS=0.01)
+    response = client.get('/api/stream', buffered=False)
+    with app.app_context():
+        notify(user, {'type': 'task.deleted', 'id': 5})
+
+    [event] = events(response, 1)
+    response.close()
+
+    assert event.startswith('event: task.deleted\ndata: ')
+
+
+def test_stream_reports_changes_made_in_other_processes(app, client, user):
+    app.config.update(LIVE_UPDATES=True, SERVE_STREAM=True, STREAM_HEARTBEAT_SECONDS=0.01)
+    response = client.get('/api/stream', buffered=False)
+    # A write that publishes nothing to this process, like sync_worker.py without Redis
+    with app.app_context():
+        bump_data_version(user)
+        db.session.commit()
+
+    [event] = events(response, 1)
+    response.close()
+
+    assert event.startswith('event: data.changed\n')
+    assert '"data_version":1' in event
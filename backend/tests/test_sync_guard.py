@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+import pytest
+import sync_guard
+from sync_guard import FlightFailed, RateLimited, RedisSingleFlight
+
+
+def limit(app, burst, per_minute=1):
+    app.config.update(SYNC_RATE_LIMIT_BURST=burst, SYNC_RATE_LIMIT_PER_MINUTE=per_minute)
+    sync_guard.init_app(app)
+
+
+def concurrent_syncs(app, user, clients):
+    barrier = threading.Barrier(clients)
+    responses = []
+
+    def worker():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user
+        barrier.wait()
+        responses.append(client.post('/api/calendar/sync?force=true'))
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_fresh_rows_answer_without_google(client, google):
+    first = client.post('/api/calendar/sync')
+    second = client.post('/api/calendar/sync')
+    forced = client.post('/api/calendar/sync?force=true')
+
+    assert [r.headers['X-Sync-Status'] for r in (first, second, forced)] == ['synced', 'fresh', 'synced']
+    assert google.calls == 2
+
+
+def test_syncs_past_the_burst_get_429(app, client, google):
+    limit(app, burst=2)
+
+    statuses = [client.post('/api/calendar/sync?force=true').status_code for _ in range(3)]
+    refused = client.post('/api/calendar/sync?force=true')
+
+    assert statuses == [200, 200, 429]
+    assert int(refused.headers['Retry-After']) > 0
+    assert refused.json['retry_after'] == int(refused.headers['Retry-After'])
+    # Fresh answers never needed a token
+    assert client.post('/api/calendar/sync').headers['X-Sync-Status'] == 'fresh'
+    assert google.calls == 2
+
+
+def test_concurrent_syncs_share_one_call_and_one_token(app, user, google):
+    limit(app, burst=1)
+    google.calendar.latency = 0.3
+
+    responses = concurrent_syncs(app, user, 5)
+
+    assert google.calls == 1
+    assert sorted(r.headers['X-Sync-Status'] for r in responses) == ['coalesced'] * 4 + ['synced']
+
+
+def test_followers_share_the_leaders_429(app, client, user, google):
+    limit(app, burst=1)
+    client.post('/api/calendar/sync?force=true')
+
+    responses = concurrent_syncs(app, user, 3)
+
+    assert [r.status_code for r in responses] == [429] * 3
+    assert google.calls == 1
+
+
+@pytest.fixture
+def redis_client():
+    redis = pytest.importorskip('redis')
+    url = os.environ.get('TEST_REDIS_URL')
+    if not url:
+        pytest.skip('set TEST_REDIS_URL to run the shared-backend tests')
+    client = redis.Redis.from_url(url)
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+def lead_while(flight, key, fn, started):
+    def run():
+        try:
+            flight.run(key, fn, follower=None)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait()
+    return thread
+
+
+def slow(result=None, error=None, seconds=0.2):
+    started = threading.Event()
+
+    def fn():
+        started.set()
+        time.sleep(seconds)
+        if error:
+            raise error
+        return result
+    return fn, started
+
+
+def test_redis_followers_read_back_after_the_leader_succeeds(redis_client):
+    flight = RedisSingleFlight(redis_client, poll_seconds=0.01)
+    fn, started = slow('leader')
+    thread = lead_while(flight, 'k', fn, started)
+
+    assert flight.run('k', lambda: 'unused', lambda: 'stored') == ('stored', True)
+    thread.join()
+
+
+@pytest.mark.parametrize('error,expected', [
+    (RuntimeError('Google is down'), FlightFailed),
+    (RateLimited(7), RateLimited),
+])
+def test_redis_followers_share_the_leaders_failure(redis_client, error, expected):
+    flight = RedisSingleFlight(redis_client, poll_seconds=0.01)
+    fn, started = slow(error=error)
+    thread = lead_while(flight, 'k', fn, started)
+
+    with pytest.raises(expected):
+        flight.run('k', lambda: 'unused', lambda: 'stale rows')
+    thread.join()
+
+
+def test_redis_followers_give_up_at_the_deadline(redis_client):
+    flight = RedisSingleFlight(redis_client, lock_seconds=0.2, poll_seconds=0.01)
+    fn, started = slow('leader', seconds=1)
+    thread = lead_while(flight, 'k', fn, started)
+
+    with pytest.raises(FlightFailed):
+        flight.run('k', lambda: 'unused', lambda: 'stale rows')
+    thread.join()
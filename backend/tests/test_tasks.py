@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'operations', None])
+def test_batch_rejects_a_body_that_is_not_an_object(client, body):
+    response = client.post('/api/tasks/batch', json=body)
+
+    assert response.status_code == 400
+    assert 'operations' in response.json['error']
+
+
+def test_batch_rejects_operation_data_that_is_not_an_object(client):
+    created = client.post('/api/tasks', json={'title': 'write', 'duration_minutes': 30}).json
+
+    response = client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'update', 'id': created['id'], 'data': ['priority', 'Low']},
+        {'op': 'update', 'id': created['id'], 'data': {'priority': 'Low'}},
+    ]})
+
+    assert response.status_code == 200
+    assert [result['status'] for result in response.json['results']] == [400, 200]
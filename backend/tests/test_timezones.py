@@ -0,0 +1,37 @@
+from datetime import date, datetime
+from intervals import minute_time
+from models import CalendarEvent
+from routes.calendar_sync import summarize_events
+from timezones import work_window
+
+FALL_BACK = date(2026, 11, 1)
+SPRING_FORWARD = date(2026, 3, 8)
+
+
+def test_work_window_minutes_are_elapsed_on_dst_days():
+    fall = work_window('America/Chicago', FALL_BACK, 9, 17)
+    spring = work_window('America/Chicago', SPRING_FORWARD, 9, 17)
+    regular = work_window('America/Chicago', date(2026, 6, 1), 9, 17)
+
+    assert (fall.start_minute, fall.end_minute, fall.total_minutes) == (600, 1080, 480)
+    assert (spring.start_minute, spring.end_minute, spring.total_minutes) == (480, 960, 480)
+    assert (regular.start_minute, regular.end_minute) == (540, 1020)
+
+
+def test_events_and_window_share_a_clock_on_dst_days():
+    window = work_window('America/Chicago', FALL_BACK, 9, 17)
+    # 10:00-10:30 CST
+    meeting = CalendarEvent(start=datetime(2026, 11, 1, 16), end=datetime(2026, 11, 1, 16, 30), all_day=False)
+
+    _, busy, free = summarize_events([meeting], window.start, window.end)
+
+    assert busy.to_list() == [[660, 690]]
+    assert free.to_list() == [[600, 660], [690, 1080]]
+    assert free.total() == 450
+
+
+def test_minute_time_inverts_minutes_since():
+    window = work_window('America/Chicago', SPRING_FORWARD, 9, 17)
+
+    assert minute_time(window.day_start, window.start_minute) == window.start
+    assert minute_time(window.day_start, 600).hour == 11
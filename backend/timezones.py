@@ -0,0 +1,76 @@
+"""Per-user timezones and work-window boundaries.
+
+ZoneInfo objects are cached per name, and the work window for a
+(timezone, day, work hours) combination is computed once and memoized, so
+next-task checks and syncs across many users in many regions repeat no
+timezone arithmetic.
+"""
+from collections import namedtuple
+from datetime import datetime, time
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from intervals import minutes_since
+
+# Used for users who have not set a timezone yet; everything ran in this zone before
+DEFAULT_TIMEZONE = 'America/Chicago'
+DEFAULT_WORK_START_HOUR = 9
+DEFAULT_WORK_END_HOUR = 17
+
+# day_start is local midnight; start and end bound the work hours. The
+# *_minute fields are minutes since day_start, the unit IntervalSet uses.
+WorkWindow = namedtuple('WorkWindow', 'day tz day_start start end start_minute end_minute total_minutes')
+
+
+@lru_cache(maxsize=None)
+def _zone(name):
+    return ZoneInfo(name)
+
+
+def is_valid_timezone(name):
+    if not isinstance(name, str) or not name:
+        return False
+    try:
+        _zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def zone(name):
+    """Cached ZoneInfo for an IANA name, falling back to DEFAULT_TIMEZONE"""
+    return _zone(name) if is_valid_timezone(name) else _zone(DEFAULT_TIMEZONE)
+
+
+def user_zone(user):
+    return zone(user.timezone)
+
+
+def local_today(timezone_name):
+    """The current date in the given zone, not where the server is"""
+    return datetime.now(zone(timezone_name)).date()
+
+
+def work_hours(user):
+    work_start_hour = user.work_start_hour if user.work_start_hour is not None else DEFAULT_WORK_START_HOUR
+    work_end_hour = user.work_end_hour if user.work_end_hour is not None else DEFAULT_WORK_END_HOUR
+    return work_start_hour, work_end_hour
+
+
+@lru_cache(maxsize=4096)
+def work_window(timezone_name, day, work_start_hour, work_end_hour):
+    tz = zone(timezone_name)
+    day_start = datetime.combine(day, time()).replace(tzinfo=tz)
+    start = datetime.combine(day, time(work_start_hour)).replace(tzinfo=tz)
+    end = datetime.combine(day, time(work_end_hour)).replace(tzinfo=tz)
+    # Elapsed minutes, like every interval; 9:00 is minute 480 on a
+    # spring-forward day and 600 on a fall-back day
+    start_minute = minutes_since(day_start, start)
+    end_minute = minutes_since(day_start, end)
+    return WorkWindow(day, tz, day_start, start, end, start_minute, end_minute, end_minute - start_minute)
+
+
+def user_work_window(user, day=None):
+    """The user's memoized WorkWindow for `day` (default: their local today)"""
+    if day is None:
+        day = local_today(user.timezone)
+    return work_window(user.timezone or DEFAULT_TIMEZONE, day, *work_hours(user))
@@ -0,0 +1,51 @@
+"""Short-lived in-process cache of User rows.
+
+Lets login_required routes skip the users lookup for a short while. Every
+write to a user calls invalidate_cached_user, but only in the worker that
+made the write. Other workers keep serving their copy until it expires, so
+for up to USER_CACHE_TTL_SECONDS they can see old work hours or timezone,
+or an access token that has since been refreshed. Google keeps accepting
+the old token until it expires, so calls using it still succeed. Set
+USER_CACHE_TTL_SECONDS=0 to turn the cache off when that window matters.
+
+Endpoints behind etags.conditional_get pass the data_version their ETag
+was built from, and a cached copy older than that is reloaded, so a body
+never goes out under an ETag it does not match.
+"""
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from database import db
+from models import User
+import os
+import time
+
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL_SECONDS', 30))
+_user_cache = {}  # user_id -> (expires_at, column values)
+
+def invalidate_cached_user(user_id):
+    _user_cache.pop(user_id, None)
+
+def load_user(user_id, data_version=None):
+    """The User for `user_id`, from the session, this worker's cache or the database.
+    
+    With `data_version`, a cached copy at any other version is reloaded.
+    """
+    key = identity_key(User, user_id)
+    if key in db.session.identity_map:
+        return db.session.identity_map[key]
+
+    cached = _user_cache.get(user_id)
+    if cached and data_version is not None and cached[1]['data_version'] != data_version:
+        cached = None
+    if cached and cached[0] > time.monotonic():
+        # Attach a copy to this session without a SELECT
+        user = User(**cached[1])
+        make_transient_to_detached(user)
+        db.session.add(user)
+        return user
+
+    user = User.query.get(user_id)
+    if user:
+        values = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, values)
+    return user
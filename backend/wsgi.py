@@ -0,0 +1,4 @@
+"""WSGI entry point: `gunicorn wsgi:app` builds the one app a worker serves."""
+from app import create_app
+
+app = create_app()
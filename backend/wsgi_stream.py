@@ -0,0 +1,11 @@
+"""WSGI entry point for the gevent stream process (gunicorn_stream.conf.py).
+
+Imported in each worker after gevent has patched the standard library;
+psycopg2 talks to PostgreSQL through its own C code, so it is made
+cooperative here before any connection opens.
+"""
+from psycogreen.gevent import patch_psycopg
+from app import create_app
+
+patch_psycopg()
+app = create_app({'SERVE_STREAM': True})
@@ -10,6 +10,15 @@ const api = axios.create({
   },
 });
 
+// Live updates (server-sent events). Off unless the backend runs with
+// LIVE_UPDATES=true on gevent workers; each open stream holds a connection.
+export const LIVE_UPDATES = process.env.REACT_APP_LIVE_UPDATES === 'true';
+// The separate gevent process serving /api/stream (gunicorn_stream.conf.py)
+const STREAM_BASE_URL = process.env.REACT_APP_STREAM_URL || API_BASE_URL;
+
+export const openEventStream = () =>
+  LIVE_UPDATES ? new EventSource(`${STREAM_BASE_URL}/api/stream`, { withCredentials: true }) : null;
+
 // Auth API
 export const authAPI = {
   initiateGoogleAuth: () => api.post('/auth/google'),
@@ -19,18 +28,32 @@ export const authAPI = {
 
 // Tasks API
 export const tasksAPI = {
-  getTasks: () => api.get('/api/tasks'),
+  getTasks: (params) => api.get('/api/tasks', { params }),
   getTask: (id) => api.get(`/api/tasks/${id}`),
   createTask: (taskData) => api.post('/api/tasks', taskData),
   updateTask: (id, taskData) => api.put(`/api/tasks/${id}`, taskData),
   deleteTask: (id) => api.delete(`/api/tasks/${id}`),
   getNextTask: () => api.get('/api/tasks/next'),
+  searchTasks: (q, params) => api.get('/api/tasks/search', { params: { q, ...params } }),
+  batchTasks: (operations) => api.post('/api/tasks/batch', { operations }),
 };
 
 // Calendar API
 export const calendarAPI = {
   syncCalendar: () => api.post('/api/calendar/sync'),
+  syncCalendarRange: (start, days) => api.post('/api/calendar/sync', null, { params: { start, days } }),
   getTodayCalendar: () => api.get('/api/calendar/today'),
+  getCalendarRange: (start, days) => api.get('/api/calendar/range', { params: { start, days } }),
+};
+
+// Plan API
+export const planAPI = {
+  getTodayPlan: () => api.get('/api/plan/today'),
+};
+
+// Analytics API
+export const analyticsAPI = {
+  getDailyStats: (params) => api.get('/api/analytics/daily', { params }),
 };
 
 // Settings API
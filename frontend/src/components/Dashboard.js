@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from 'react';
-import { tasksAPI, calendarAPI } from '../api/api';
+import React, { useState, useEffect, useRef } from 'react';
+import { tasksAPI, calendarAPI, openEventStream } from '../api/api';
 import Navbar from './Navbar';
 import DayOverview from './DayOverview';
 import TaskList from './TaskList';
@@ -7,8 +7,17 @@ import TaskForm from './TaskForm';
 import Settings from './Settings';
 import './Dashboard.css';
 
+// Tasks fetched per page; more load on demand
+const TASK_PAGE_SIZE = 100;
+// The largest page GET /api/tasks serves
+const MAX_TASK_PAGE_SIZE = 500;
+
 function Dashboard({ user, onLogout }) {
   const [tasks, setTasks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Read by refreshes from stream listeners, which hold the first render's closures
+  const loadedCount = useRef(0);
   const [calendarData, setCalendarData] = useState(null);
   const [nextTask, setNextTask] = useState(null);
   const [showTaskForm, setShowTaskForm] = useState(false);
@@ -21,6 +30,19 @@ function Dashboard({ user, onLogout }) {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  useEffect(() => {
+    // Refresh when another tab, device or the background sync changes data
+    const stream = openEventStream();
+    if (!stream) return undefined;
+    const refresh = () => loadData();
+    ['task.created', 'task.updated', 'task.deleted', 'tasks.batch', 'calendar.synced', 'data.changed'].forEach((type) =>
+      stream.addEventListener(type, refresh)
+    );
+    stream.addEventListener('next_task.changed', (event) => setNextTask(JSON.parse(event.data).task));
+    return () => stream.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
   const loadData = async () => {
     try {
       await Promise.all([loadTasks(), loadCalendar()]);
@@ -34,13 +56,31 @@ function Dashboard({ user, onLogout }) {
 
   const loadTasks = async () => {
     try {
-      const response = await tasksAPI.getTasks();
-      setTasks(response.data);
+      // A refresh reloads as many tasks as are already shown, in one request
+      const limit = Math.min(Math.max(TASK_PAGE_SIZE, loadedCount.current), MAX_TASK_PAGE_SIZE);
+      const response = await tasksAPI.getTasks({ limit });
+      loadedCount.current = response.data.tasks.length;
+      setTasks(response.data.tasks);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error loading tasks:', error);
     }
   };
 
+  const loadMoreTasks = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await tasksAPI.getTasks({ limit: TASK_PAGE_SIZE, cursor: nextCursor });
+      loadedCount.current += response.data.tasks.length;
+      setTasks((current) => [...current, ...response.data.tasks]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more tasks:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadCalendar = async () => {
     try {
       const response = await calendarAPI.getTodayCalendar();
@@ -115,7 +155,10 @@ function Dashboard({ user, onLogout }) {
       setCalendarData(response.data);
       await loadData();
     } catch (error) {
-
+      if (error.response?.status === 429) {
+        alert(`Calendar was synced recently. Try again in ${error.response.data.retry_after} seconds.`);
+        return;
+      }
       alert('Failed to sync calendar');
     }
   };
@@ -165,6 +208,14 @@ function Dashboard({ user, onLogout }) {
             onEdit={handleEditTask}
             onDelete={handleDeleteTask}
           />
+
+          {nextCursor && (
+            <div className="load-more">
+              <button className="btn btn-secondary" onClick={loadMoreTasks} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more tasks'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
 
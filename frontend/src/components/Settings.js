@@ -2,9 +2,19 @@ import React, { useState, useEffect } from 'react';
 import { settingsAPI } from '../api/api';
 import './Settings.css';
 
+const BROWSER_TIMEZONE = Intl.DateTimeFormat().resolvedOptions().timeZone;
+
+// Every IANA zone where the browser can list them, otherwise the saved and local ones
+const timezoneOptions = (saved) => {
+  const zones = typeof Intl.supportedValuesOf === 'function' ? Intl.supportedValuesOf('timeZone') : [];
+  return Array.from(new Set([saved, BROWSER_TIMEZONE, ...zones])).filter(Boolean);
+};
+
 function Settings({ onClose, onSave }) {
   const [workStartHour, setWorkStartHour] = useState(9);
   const [workEndHour, setWorkEndHour] = useState(17);
+  const [timezone, setTimezone] = useState(BROWSER_TIMEZONE);
+  const [savedTimezone, setSavedTimezone] = useState(null);
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
   const [error, setError] = useState('');
@@ -19,6 +29,11 @@ function Settings({ onClose, onSave }) {
       const response = await settingsAPI.getWorkHours();
       setWorkStartHour(response.data.work_start_hour);
       setWorkEndHour(response.data.work_end_hour);
+      // Suggest the browser's zone only until one has been chosen
+      if (response.data.timezone_set) {
+        setTimezone(response.data.timezone);
+        setSavedTimezone(response.data.timezone);
+      }
     } catch (err) {
       setError('Failed to load settings');
     } finally {
@@ -47,6 +62,7 @@ function Settings({ onClose, onSave }) {
       await settingsAPI.updateWorkHours({
         work_start_hour: workStartHour,
         work_end_hour: workEndHour,
+        timezone,
       });
       setSuccess('Work hours updated successfully!');
       setTimeout(() => {
@@ -129,6 +145,22 @@ function Settings({ onClose, onSave }) {
             </div>
           </div>
 
+          <div className="form-group">
+            <label htmlFor="timezone">Timezone</label>
+            <select
+              id="timezone"
+              value={timezone}
+              onChange={(e) => setTimezone(e.target.value)}
+              disabled={saving}
+            >
+              {timezoneOptions(savedTimezone).map((zone) => (
+                <option key={zone} value={zone}>
+                  {zone === BROWSER_TIMEZONE ? `${zone} (this device)` : zone}
+                </option>
+              ))}
+            </select>
+          </div>
+
           <div className="work-hours-preview">
             <strong>Work Day Duration:</strong>{' '}
             {workEndHour - workStartHour} {workEndHour - workStartHour === 1 ? 'hour' : 'hours'}